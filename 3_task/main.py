@@ -1,90 +1,506 @@
 import pygame
 import numpy as np
 import sys
+import argparse
+import csv
+import json
+import os
+import time
+import hashlib
+import struct
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from typing import Tuple
 
+try:
+    from PIL import Image
+except ImportError:  # only the image ingestion needs Pillow
+    Image = None
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".gif")
+
+# Number of set bits of every byte, used when numpy has no bitwise_count
+POPCOUNT_TABLE = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+def popcount(words: np.ndarray) -> np.ndarray:
+    """Number of set bits of every uint64 word"""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words)
+    return POPCOUNT_TABLE[words.view(np.uint8)].reshape(*words.shape, 8).sum(axis=-1, dtype=np.uint8)
+
+def pack_bipolar(patterns: np.ndarray) -> np.ndarray:
+    """Bipolar (P, N) rows packed into uint64 words (P, ceil(N / 64)), bit set = +1, zero padded"""
+    packed = np.packbits(patterns > 0, axis=-1, bitorder="little")
+    padding = -packed.shape[-1] % 8
+    if padding:
+        packed = np.concatenate([packed, np.zeros((*packed.shape[:-1], padding), dtype=np.uint8)], axis=-1)
+    return np.ascontiguousarray(packed).view(np.uint64)
+
+def unpack_bits(words: np.ndarray, count: int) -> np.ndarray:
+    """(0, 1) uint8 matrix of the first count bits of every row of packed uint64 words"""
+    return np.unpackbits(np.ascontiguousarray(words).view(np.uint8), axis=-1, count=count, bitorder="little")
+
+# Header of a saved network: magic, version, size, storage, dtype, pattern count, offsets of patterns and weights
+NETWORK_HEADER = struct.Struct("<8sII8s8sQQQ")
+NETWORK_MAGIC = b"HOPFIELD"
+NETWORK_VERSION = 1
+# Arrays in the file start on 64 byte boundaries, so they can be memory-mapped directly
+NETWORK_ALIGNMENT = 64
+
 class HopfieldNetwork:
-    def __init__(self, size: int):
+    """Hopfield network over size x size bipolar units.
+
+    storage="dense" keeps the full weight matrix (float64, float32 or int16),
+    storage="patterns" keeps only the stored patterns as an int8 (P, N) matrix
+    and computes W @ s as X.T @ (X @ s) - P * s, so memory is O(PN) instead of O(N^2).
+    storage="bits" packs the patterns into uint64 words (one bit per unit) and
+    gets the overlaps X @ s as N - 2 * popcount(x XOR s).
+    """
+    STORAGES = ("dense", "patterns", "bits")
+    DENSE_DTYPES = (np.float64, np.float32, np.int16)
+
+    def __init__(self, size: int, storage: str = "dense", dtype=np.float64):
+        if storage not in self.STORAGES:
+            raise ValueError(f"storage must be one of {self.STORAGES}, got {storage!r}")
+        if storage == "dense" and np.dtype(dtype) not in [np.dtype(t) for t in self.DENSE_DTYPES]:
+            raise ValueError(f"dense weights must be float64, float32 or int16, got {np.dtype(dtype)}")
         self.size = size
         self.total_units = size * size
-        self.patterns = [] # ukládání patternů
-        self.weights = np.zeros((self.total_units, self.total_units))
-        
+        self.storage = storage
+        self.dtype = np.dtype(dtype)
+        # Uložené bipolární patterny (v režimu bits po 64 v uint64), kapacita roste zdvojnásobením
+        if storage == "bits":
+            self._patterns = np.zeros((0, (self.total_units + 63) // 64), dtype=np.uint64)
+        else:
+            self._patterns = np.zeros((0, self.total_units), dtype=np.int8)
+        self.pattern_count = 0
+        self._weight_array = np.zeros((self.total_units, self.total_units), dtype=self.dtype) if storage == "dense" else None
+        # Váhy načtené sítě se čtou až při prvním použití
+        self._weight_loader = None
+
+    @property
+    def _weights(self) -> np.ndarray:
+        if self._weight_array is None and self._weight_loader is not None:
+            self._weight_array = self._weight_loader()
+            self._weight_loader = None
+        return self._weight_array
+
+    @property
+    def patterns(self) -> np.ndarray:
+        """Stored bipolar patterns as an int8 (P, N) matrix"""
+        if self.storage == "bits":
+            return 2 * unpack_bits(self._patterns[:self.pattern_count], self.total_units).astype(np.int8) - 1
+        return self._patterns[:self.pattern_count]
+
+    @property
+    def weights(self) -> np.ndarray:
+        """Weight matrix, built on demand (N x N float32) when only patterns are stored"""
+        if self.storage == "dense":
+            return self._weights
+        patterns = self.patterns.astype(np.float32)
+        weights = patterns.T @ patterns
+        np.fill_diagonal(weights, 0)
+        return weights
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the stored patterns and weights"""
+        return self._patterns[:self.pattern_count].nbytes + (0 if self._weight_array is None else self._weight_array.nbytes)
+
+    def to_bipolar(self, pattern: np.ndarray) -> np.ndarray:
+        # Převod na bipolar form (-1, 1) a reshape na vektor
+        return self.to_bipolar_rows([pattern])[0]
+
+    def to_bipolar_rows(self, patterns) -> np.ndarray:
+        """Stack of patterns (binary or bipolar, any shape per pattern) as an int8 (P, N) bipolar matrix"""
+        patterns = np.asarray(patterns)
+        # reshape(0, -1) is ambiguous, an empty stack gets the network's width
+        rows = patterns.reshape(len(patterns), -1 if len(patterns) else self.total_units)
+        bipolar_patterns = np.where(rows > 0, 1, -1).astype(np.int8)
+        if bipolar_patterns.shape[1] != self.total_units:
+            raise ValueError(f"Patterns have {bipolar_patterns.shape[1]} units, the network has {self.total_units}")
+        return bipolar_patterns
+
+    def _block_rows(self) -> int:
+        # Bloky řádků matice vah omezují dočasnou paměť na ~4M prvků
+        return max(1, (1 << 22) // max(self.total_units, 1))
+
+    def _hebbian_update(self, patterns: np.ndarray, sign: int = 1) -> None:
+        """Add (or subtract) the outer products of patterns to the dense weights, block of rows at a time.
+
+        For k patterns this is one rank-k update X.T @ X costing O(k N^2), the diagonal stays zero.
+        """
+        patterns = patterns.astype(np.float32)
+        step = self._block_rows()
+        for start in range(0, self.total_units, step):
+            block = patterns[:, start:start + step].T @ patterns
+            self._weights[start:start + step] += (sign * block).astype(self.dtype)
+        np.fill_diagonal(self._weights, 0)  # No self-connections
+
     def add_pattern(self, pattern: np.ndarray) -> None:
-        # Převod na bipolar form (-1, 1)
-        bipolar_pattern = 2 * pattern - 1
-        
-        # Reshape
-        if bipolar_pattern.ndim > 1:
-            bipolar_pattern = bipolar_pattern.flatten()
-            
-        # Uložení patternu
-        self.patterns.append(bipolar_pattern)
-        
+        self.add_patterns([pattern])
+
+    def add_patterns(self, patterns) -> None:
+        """Store many patterns at once, the weights get a single rank-k update"""
+        if not len(patterns):
+            return
+        new_patterns = self.to_bipolar_rows(patterns)
+
+        # Uložení patternů
+        count = self.pattern_count + len(new_patterns)
+        if count > len(self._patterns):
+            grown = np.zeros((max(4, 2 * len(self._patterns), count), self._patterns.shape[1]),
+                             dtype=self._patterns.dtype)
+            grown[:self.pattern_count] = self._patterns[:self.pattern_count]
+            self._patterns = grown
+        self._patterns[self.pattern_count:count] = pack_bipolar(new_patterns) if self.storage == "bits" else new_patterns
+        self.pattern_count = count
+
         # Aktualizace vah
-        pattern_matrix = np.outer(bipolar_pattern, bipolar_pattern)
-        np.fill_diagonal(pattern_matrix, 0)  # No self-connections
-        self.weights += pattern_matrix
-        
+        if self.storage == "dense":
+            self._hebbian_update(new_patterns)
+
+    def remove_patterns(self, indices) -> None:
+        """Forget the patterns at indices, their outer products are subtracted in one rank-k update"""
+        indices = np.unique(np.asarray(indices, dtype=np.int64).reshape(-1))
+        indices = indices[(indices >= 0) & (indices < self.pattern_count)]
+        if not len(indices):
+            return
+
+        stored = self._patterns[:self.pattern_count]
+        removed = stored[indices].copy()
+        keep = np.ones(self.pattern_count, dtype=bool)
+        keep[indices] = False
+        remaining = stored[keep]
+        self._patterns[:len(remaining)] = remaining
+        self.pattern_count = len(remaining)
+
+        if self.storage == "dense":
+            self._hebbian_update(removed, sign=-1)
+
     def get_weighted_matrix(self) -> np.ndarray:
         return self.weights
-        
+
+    def local_field(self, state: np.ndarray) -> np.ndarray:
+        """W @ s for a bipolar state vector (N,) or every row of a (B, N) stack of states.
+
+        W is symmetric, so a stack is multiplied as states @ W in one matrix-matrix
+        product. In the patterns storage this is (states @ X.T) @ X - P * states.
+        """
+        state = np.asarray(state, dtype=np.float32)
+        if self.storage == "bits":
+            # x = 2b - 1, so X.T @ m = 2 * (m @ B) - sum(m) for the bit matrix B
+            overlaps = self.pattern_overlaps(state).astype(np.float32)
+            field = 2 * self._bits_product(overlaps) - overlaps.sum(axis=-1, keepdims=True)
+            return field - self.pattern_count * state
+        if self.storage == "patterns":
+            patterns = self.patterns
+            return (state @ patterns.T) @ patterns - self.pattern_count * state
+        if self._weights.dtype.kind == "f":
+            return state.astype(self._weights.dtype) @ self._weights
+        # Integer weights are converted to float a block of rows at a time
+        field = np.empty(state.shape, dtype=np.float32)
+        step = self._block_rows()
+        for start in range(0, self.total_units, step):
+            field[..., start:start + step] = state @ self._weights[start:start + step].astype(np.float32).T
+        return field
+
+    def pattern_overlaps(self, state: np.ndarray) -> np.ndarray:
+        """Overlaps X @ s of a bipolar state (N,) or states (B, N) with all stored patterns"""
+        if self.storage != "bits":
+            return np.asarray(state, dtype=np.float32) @ self.patterns.T
+        packed = pack_bipolar(np.asarray(state))
+        stored = self._patterns[:self.pattern_count]
+        flat = packed.reshape(-1, packed.shape[-1])
+        overlaps = np.empty((len(flat), self.pattern_count), dtype=np.int64)
+        # Bloky stavů omezují dočasné pole XOR na ~4M slov
+        step = max(1, (1 << 22) // max(stored.size, 1))
+        for start in range(0, len(flat), step):
+            differences = popcount(flat[start:start + step, None, :] ^ stored[None, :, :]).sum(axis=-1)
+            overlaps[start:start + step] = self.total_units - 2 * differences.astype(np.int64)
+        return overlaps.reshape(*packed.shape[:-1], self.pattern_count)
+
+    def _bits_product(self, coefficients: np.ndarray) -> np.ndarray:
+        """coefficients @ B for the (P, N) bit matrix of the packed patterns, unpacked a block of patterns at a time"""
+        result = np.zeros((*coefficients.shape[:-1], self.total_units), dtype=np.float32)
+        step = self._block_rows()
+        for start in range(0, self.pattern_count, step):
+            bits = unpack_bits(self._patterns[start:min(start + step, self.pattern_count)], self.total_units)
+            result += coefficients[..., start:start + step] @ bits.astype(np.float32)
+        return result
+
+    def weight_column(self, idx: int) -> np.ndarray:
+        """Weights of unit idx to all units (a row or column of the symmetric W)"""
+        if self.storage == "dense":
+            return self._weights[idx] if self._weights.dtype.kind == "f" else self._weights[idx].astype(np.float32)
+        if self.storage == "bits":
+            stored = self._patterns[:self.pattern_count].view(np.uint8)
+            unit = 2 * ((stored[:, idx >> 3] >> (idx & 7)) & 1).astype(np.float32) - 1
+            column = 2 * self._bits_product(unit) - unit.sum()
+            column[idx] = 0
+            return column
+        patterns = self.patterns
+        column = patterns[:, idx].astype(np.float32) @ patterns
+        column[idx] = 0
+        return column
+
     def reconstruct_sync(self, pattern: np.ndarray, max_iterations: int = 10) -> np.ndarray:
-        # Převod na bipolar form (-1, 1)
-        bipolar_pattern = 2 * pattern - 1
-        
-        # Reshape
-        if bipolar_pattern.ndim > 1:
-            bipolar_pattern = bipolar_pattern.flatten()
-            
-        current_state = bipolar_pattern.copy()
-        
-        # Iterujeme dokud nedosáhneme max_iterations
-        for _ in range(max_iterations):
-            # Calculate new state (all units at once)
-            new_state = np.sign(np.dot(self.weights, current_state))
-            # Fix zeros (sign(0) = 0, but we want 1 or -1)
-            new_state[new_state == 0] = 1
-            
-            # Check for convergence
-            if np.array_equal(new_state, current_state):
+        return self.reconstruct_batch([pattern], max_iterations)[0][0]
+
+    def reconstruct_batch(self, probes, max_iterations: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """Synchronous recall of a (B, N) stack of probes (or B patterns of any shape).
+
+        Every step updates all still changing rows with one matrix-matrix product,
+        rows that stopped changing drop out. Returns the binary (0, 1) states as
+        (B, N) and the number of updates each row needed to converge.
+        """
+        states = self.to_bipolar_rows(probes)
+        iterations = np.zeros(len(states), dtype=np.int64)
+        active = np.arange(len(states))
+
+        # Iterujeme dokud nedosáhneme max_iterations nebo se všechny řádky neustálí
+        for step in range(max_iterations):
+            if not len(active):
                 break
-                
-            current_state = new_state
-        
+            # Calculate new states (all units at once), sign(0) counts as 1
+            new_states = np.where(self.local_field(states[active]) >= 0, 1, -1).astype(np.int8)
+            changed = (new_states != states[active]).any(axis=1)
+            states[active] = new_states
+            iterations[active[changed]] = step + 1
+            active = active[changed]
+
         # Převod na binární tvar (0, 1)
-        return (current_state + 1) / 2
-        
-    def reconstruct_async(self, pattern: np.ndarray, max_iterations: int = 50) -> np.ndarray:
-        # Převod na bipolar form (-1, 1)
-        bipolar_pattern = 2 * pattern - 1
+        return (states + 1) / 2, iterations
         
-        if bipolar_pattern.ndim > 1:
-            bipolar_pattern = bipolar_pattern.flatten()
-            
-        current_state = bipolar_pattern.copy()
-        
-        # Iterujeme dokud nedosáhneme max_iterations
+    def reconstruct_async(self, pattern: np.ndarray, max_iterations: int = 50, seed=None) -> np.ndarray:
+        """Asynchronous recall in a new random unit order every sweep, until a sweep flips nothing"""
+        current_state = self.to_bipolar(pattern)
+        field = self.local_field(current_state)
+        rng = np.random.default_rng(seed)
+
+        # Iterujeme dokud nedosáhneme max_iterations nebo stabilního stavu
         for _ in range(max_iterations):
-            # Aktualizujeme každou jednotku náhodně
-            for i in range(self.total_units):
-                idx = np.random.randint(0, self.total_units)
-                activation = np.dot(self.weights[idx], current_state)
-                current_state[idx] = 1 if activation >= 0 else -1
+            order = rng.permutation(self.total_units)
+            position = 0
+            flipped = False
+            while position < len(order):
+                # Jednotky, jejichž znaménko neodpovídá lokálnímu poli (sign(0) = 1)
+                remaining = order[position:]
+                unstable = (field[remaining] >= 0) != (current_state[remaining] > 0)
+                if not unstable.any():
+                    break
+                offset = int(np.argmax(unstable))
+                idx = remaining[offset]
+                current_state[idx] = -current_state[idx]
+                field += 2 * current_state[idx] * self.weight_column(idx)
+                position += offset + 1
+                flipped = True
+            if not flipped:
+                break
         
         # Převod na binární tvar (0, 1)
         return (current_state + 1) / 2
         
     def forget_pattern(self, pattern_idx: int) -> None:
-        if 0 <= pattern_idx < len(self.patterns):
-            del self.patterns[pattern_idx]
-            
-            # Znovu vypočítání vah
-            self.weights = np.zeros((self.total_units, self.total_units))
-            for pattern in self.patterns:
-                pattern_matrix = np.outer(pattern, pattern)
-                np.fill_diagonal(pattern_matrix, 0)
-                self.weights += pattern_matrix
+        # Odečtení outer productu jednoho patternu místo přepočtu všech vah
+        self.remove_patterns([pattern_idx])
+
+    def save(self, path: str) -> None:
+        """Write the network into a binary file: a fixed header, then the stored
+        patterns and (dense storage) the weights as raw arrays on 64 byte boundaries.
+        """
+        def aligned(offset):
+            return -(-offset // NETWORK_ALIGNMENT) * NETWORK_ALIGNMENT
+
+        patterns = np.ascontiguousarray(self._patterns[:self.pattern_count])
+        patterns_offset = aligned(NETWORK_HEADER.size)
+        weights_offset = aligned(patterns_offset + patterns.nbytes) if self.storage == "dense" else 0
+
+        # Zápis přes dočasný soubor, načtená síť může mít původní soubor namapovaný
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(NETWORK_HEADER.pack(NETWORK_MAGIC, NETWORK_VERSION, self.size, self.storage.encode(),
+                                        self.dtype.name.encode(), self.pattern_count, patterns_offset,
+                                        weights_offset))
+            f.write(bytes(patterns_offset - f.tell()))
+            patterns.tofile(f)
+            if self.storage == "dense":
+                f.write(bytes(weights_offset - f.tell()))
+                step = self._block_rows()
+                for start in range(0, self.total_units, step):
+                    np.ascontiguousarray(self._weights[start:start + step]).tofile(f)
+        del patterns
+
+        # Pole namapovaná z cílového souboru se načtou do paměti, namapovaný soubor nejde na Windows nahradit
+        for name in ("_patterns", "_weight_array"):
+            array = getattr(self, name)
+            if isinstance(array, np.memmap) and os.path.exists(path) and os.path.samefile(array.filename, path):
+                setattr(self, name, np.array(array))
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "HopfieldNetwork":
+        """Network saved by save.
+
+        With mmap the arrays are memory-mapped copy-on-write (changes stay in
+        memory, the file is never modified), so even big networks open instantly.
+        The weight matrix is only mapped or read when it is first used.
+        """
+        with open(path, "rb") as f:
+            header = f.read(NETWORK_HEADER.size)
+        if len(header) < NETWORK_HEADER.size or header[:len(NETWORK_MAGIC)] != NETWORK_MAGIC:
+            raise ValueError(f"{path} is not a saved Hopfield network")
+        (_, version, size, storage, dtype, pattern_count,
+         patterns_offset, weights_offset) = NETWORK_HEADER.unpack(header)
+        if version != NETWORK_VERSION:
+            raise ValueError(f"Unsupported network file version {version}")
+
+        network = cls(size, storage.rstrip(b"\0").decode(), dtype.rstrip(b"\0").decode())
+
+        def read(dtype, offset, shape):
+            if mmap:
+                return np.memmap(path, dtype=dtype, mode="c", offset=offset, shape=shape)
+            return np.fromfile(path, dtype=dtype, count=int(np.prod(shape)), offset=offset).reshape(shape)
+
+        if pattern_count:
+            network._patterns = read(network._patterns.dtype, patterns_offset,
+                                     (pattern_count, network._patterns.shape[1]))
+            network.pattern_count = pattern_count
+        if network.storage == "dense":
+            shape = (network.total_units, network.total_units)
+            network._weight_array = None
+            network._weight_loader = lambda: read(network.dtype, weights_offset, shape)
+        return network
+
+def image_to_pattern(path: str, size: int = 32) -> np.ndarray:
+    """Image resized to size x size and binarised to a (0, 1) pattern, black = 1"""
+    with Image.open(path) as img:
+        gray = np.asarray(img.convert("L").resize((size, size), Image.LANCZOS))
+    return (gray < 128).astype(np.uint8)
+
+def image_files(folder: str) -> list:
+    return sorted(os.path.join(folder, name) for name in os.listdir(folder)
+                  if name.lower().endswith(IMAGE_EXTENSIONS))
+
+def load_image_patterns(folder: str, size: int = 32, workers: int = 8, cache_dir: str = None) -> np.ndarray:
+    """All images of a folder as a packed uint8 (P, ceil(size*size / 8)) pattern matrix.
+
+    The images are decoded and resized in worker threads (Pillow releases the GIL)
+    straight into the rows of a memory-mapped .npy file in cache_dir. The file
+    name is keyed by the folder, the names, sizes and modification times of its
+    images and the pattern size, so later runs only map the cached file.
+    Unpack rows with np.unpackbits(packed, axis=1, count=size * size).
+    """
+    files = image_files(folder)
+    source = hashlib.sha1(os.path.abspath(folder).encode())
+    for path in files:
+        stat = os.stat(path)
+        source.update(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(__file__)), "pattern_cache")
+    os.makedirs(cache_dir, exist_ok=True)
+    cache_path = os.path.join(cache_dir, f"patterns_{source.hexdigest()[:16]}_{size}x{size}.npy")
+    if os.path.exists(cache_path):
+        return np.load(cache_path, mmap_mode="r")
+    if Image is None:
+        raise ImportError("Loading images needs Pillow (pip install pillow)")
+
+    # Zápis do dočasného souboru, nedokončený cache soubor se nikdy nenačte
+    temp_path = cache_path + ".tmp"
+    packed = np.lib.format.open_memmap(temp_path, mode="w+", dtype=np.uint8,
+                                       shape=(len(files), (size * size + 7) // 8))
+
+    def load(row):
+        packed[row] = np.packbits(image_to_pattern(files[row], size).reshape(-1))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(load, range(len(files))))
+    packed.flush()
+    del packed
+    os.replace(temp_path, cache_path)
+    return np.load(cache_path, mmap_mode="r")
+
+def corrupt_patterns(patterns: np.ndarray, noise: float, rng: np.random.Generator) -> np.ndarray:
+    """Copies of bipolar patterns with round(noise * N) randomly chosen units flipped in every row"""
+    flips = int(round(noise * patterns.shape[1]))
+    # Prvních flips pozic náhodné permutace každého řádku
+    positions = np.argsort(rng.random(patterns.shape), axis=1)[:, :flips]
+    corrupted = patterns.copy()
+    rows = np.arange(len(patterns))[:, None]
+    corrupted[rows, positions] = -corrupted[rows, positions]
+    return corrupted
+
+def run_trial(task) -> dict:
+    """One benchmark point: train a network on random (or image) patterns and recall noisy copies of them"""
+    size, load, noise, probes, storage, max_iterations, images, seed_sequence = task
+    rng = np.random.default_rng(seed_sequence)
+    total_units = size * size
+    pattern_count = max(1, int(round(load * total_units)))
+
+    if images is None:
+        patterns = np.where(rng.random((pattern_count, total_units)) < 0.5, 1, -1).astype(np.int8)
+    else:
+        # Packed image patterns are only mapped, every process reads the same cache file
+        packed = np.load(images, mmap_mode="r")
+        pattern_count = min(pattern_count, len(packed))
+        rows = np.sort(rng.choice(len(packed), pattern_count, replace=False))
+        patterns = 2 * np.unpackbits(packed[rows], axis=1, count=total_units).astype(np.int8) - 1
+    start = time.perf_counter()
+    network = HopfieldNetwork(size, storage, np.float32)
+    network.add_patterns(patterns)
+    train_time = time.perf_counter() - start
+
+    targets = rng.integers(pattern_count, size=probes)
+    corrupted = corrupt_patterns(patterns[targets], noise, rng)
+    start = time.perf_counter()
+    states, iterations = network.reconstruct_batch(corrupted, max_iterations)
+    recall_time = time.perf_counter() - start
+
+    bipolar_states = 2 * states - 1
+    return {
+        "N": total_units,
+        "P": pattern_count,
+        "load": pattern_count / total_units,
+        "noise": noise,
+        "probes": probes,
+        "storage": storage,
+        "recall_accuracy": float(np.mean(np.all(bipolar_states == patterns[targets], axis=1))),
+        "bit_accuracy": float(np.mean(bipolar_states == patterns[targets])),
+        "mean_iterations": float(iterations.mean()),
+        "max_iterations_used": int(iterations.max()),
+        "converged": float(np.mean(iterations < max_iterations)),
+        "train_time": train_time,
+        "recall_time": recall_time,
+    }
+
+def run_benchmark(sizes, loads, noises, probes: int = 1000, storage: str = "patterns", max_iterations: int = 20,
+                  workers=None, seed: int = 0, images: str = None) -> list:
+    """Sweep network size, load P/N and noise level, one trial per combination in a process pool.
+
+    Every trial gets its own child of SeedSequence(seed), so the results do not
+    depend on the number of workers (apart from the measured times). images is
+    a packed pattern .npy from load_image_patterns used instead of random patterns.
+    """
+    grid = [(size, load, noise) for size in sizes for load in loads for noise in noises]
+    seed_sequences = np.random.SeedSequence(seed).spawn(len(grid))
+    tasks = [(size, load, noise, probes, storage, max_iterations, images, seed_sequence)
+             for (size, load, noise), seed_sequence in zip(grid, seed_sequences)]
+    if workers == 1:
+        return [run_trial(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run_trial, tasks))
+
+def write_results(results: list, path: str, config: dict = None) -> None:
+    """Benchmark rows as .csv, or .json with the configuration of the run"""
+    if path.endswith(".csv"):
+        with open(path, "w", newline="") as f:
+            # No benchmark points leave an empty file
+            if results:
+                writer = csv.DictWriter(f, fieldnames=list(results[0]))
+                writer.writeheader()
+                writer.writerows(results)
+    else:
+        with open(path, "w") as f:
+            json.dump({"config": config or {}, "results": results}, f, indent=2)
 
 class HopfieldGUI:
     BLACK = (0, 0, 0)
@@ -95,8 +511,11 @@ class HopfieldGUI:
     RED = (255, 100, 100)
     GREEN = (100, 200, 100)
     
-    def __init__(self, grid_size: int = 5, cell_size: int = 80):
+    def __init__(self, grid_size: int = 5, cell_size: int = 80, network: HopfieldNetwork = None,
+                 network_path: str = "hopfield_network.hop"):
         pygame.init()
+        if network is not None:
+            grid_size = network.size
         self.grid_size = grid_size
         self.cell_size = cell_size
         self.grid_margin = 2
@@ -112,11 +531,12 @@ class HopfieldGUI:
         window_height = grid_height + 4 * (self.button_height + self.button_margin)
         
         self.screen = pygame.display.set_mode((window_width, window_height))
-        pygame.display.set_caption("Hopfield Network - 5x5 Grid")
+        pygame.display.set_caption(f"Hopfield Network - {grid_size}x{grid_size} Grid")
         
         self.grid = np.zeros((grid_size, grid_size), dtype=int)
         
-        self.network = HopfieldNetwork(grid_size)
+        self.network = network if network is not None else HopfieldNetwork(grid_size)
+        self.network_path = network_path
 
         self.buttons = []
         button_width = (window_width - self.panel_width - 4 * self.button_margin) // 3
@@ -158,6 +578,19 @@ class HopfieldGUI:
             'text': 'Weight Matrix',
             'action': self.show_weight_matrix
         })
+
+        y_pos += self.button_height + self.button_margin
+        self.buttons.append({
+            'rect': pygame.Rect(self.button_margin, y_pos, button_width, self.button_height),
+            'text': 'Save Network',
+            'action': self.save_network
+        })
+
+        self.buttons.append({
+            'rect': pygame.Rect(2 * self.button_margin + button_width, y_pos, button_width, self.button_height),
+            'text': 'Load Network',
+            'action': self.load_network
+        })
         
         self.font = pygame.font.SysFont(None, 24)
         
@@ -282,6 +715,29 @@ class HopfieldGUI:
             self.showing_patterns = False
             self.showing_weight_matrix = False
     
+    def save_network(self) -> None:
+        try:
+            self.network.save(self.network_path)
+        except OSError as error:
+            print(f"Cannot save network: {error}")
+            return
+        print(f"Network saved to {self.network_path}")
+
+    def load_network(self) -> None:
+        try:
+            network = HopfieldNetwork.load(self.network_path)
+        except (OSError, ValueError) as error:
+            print(f"Cannot load network: {error}")
+            return
+        if network.size != self.grid_size:
+            print(f"Network in {self.network_path} is {network.size}x{network.size}, the grid is "
+                  f"{self.grid_size}x{self.grid_size}")
+            return
+        self.network = network
+        self.current_pattern_page = 0
+        self.update_navigation_buttons()
+        print(f"Network loaded from {self.network_path} ({network.pattern_count} patterns)")
+
     def reconstruct_sync(self) -> None:
         if len(self.network.patterns) > 0:
             result = self.network.reconstruct_sync(self.grid)
@@ -479,7 +935,54 @@ class HopfieldGUI:
         return self.grid_size ** 2
 
 def main():
-    app = HopfieldGUI(grid_size=5, cell_size=80)
+    parser = argparse.ArgumentParser(description="Hopfield network")
+    parser.add_argument("--benchmark", metavar="PATH",
+                        help="run the headless capacity/robustness benchmark and write it to PATH (.json or .csv)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 32, 64],
+                        help="grid sizes of the benchmarked networks (N = size * size)")
+    parser.add_argument("--loads", type=float, nargs="+", default=[0.02, 0.05, 0.1, 0.14, 0.2],
+                        help="numbers of stored patterns relative to N (P / N)")
+    parser.add_argument("--noise", type=float, nargs="+", default=[0.0, 0.1, 0.2, 0.3],
+                        help="fractions of flipped units in the probes")
+    parser.add_argument("--probes", type=int, default=1000, help="noisy probes recalled per benchmark point")
+    parser.add_argument("--storage", choices=HopfieldNetwork.STORAGES, default="patterns")
+    parser.add_argument("--max-iterations", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=None, help="benchmark processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--images", metavar="DIR",
+                        help="benchmark on the images of DIR (cached as packed patterns) instead of random patterns")
+    parser.add_argument("--image-size", type=int, default=32, help="images are resized to size x size")
+    parser.add_argument("--network", metavar="PATH", default="hopfield_network.hop",
+                        help="saved network used by the Save/Load buttons, loaded at startup when it exists")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        start = time.perf_counter()
+        images = None
+        sizes = args.sizes
+        if args.images:
+            packed = load_image_patterns(args.images, args.image_size)
+            images = packed.filename
+            sizes = [args.image_size]
+            print(f"Loaded {len(packed)} image patterns from {args.images}")
+        results = run_benchmark(sizes, args.loads, args.noise, args.probes, args.storage,
+                                args.max_iterations, args.workers, args.seed, images)
+        config = {key: value for key, value in vars(args).items() if key != "benchmark"}
+        config["cpu_count"] = os.cpu_count()
+        config["wall_time"] = time.perf_counter() - start
+        write_results(results, args.benchmark, config)
+        print(f"Saved {len(results)} benchmark points to {args.benchmark}")
+        return
+
+    network = None
+    if os.path.exists(args.network):
+        try:
+            network = HopfieldNetwork.load(args.network)
+        except (OSError, ValueError) as error:
+            print(f"Cannot load network: {error}")
+    # Větší sítě dostanou menší buňky, mřížka zůstane zhruba stejně velká
+    cell_size = 80 if network is None else max(2, 410 // network.size - 2)
+    app = HopfieldGUI(grid_size=5, cell_size=cell_size, network=network, network_path=args.network)
     app.run()
 
 if __name__ == "__main__":
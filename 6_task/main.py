@@ -1,112 +1,778 @@
 import tkinter as tk
 from tkinter import ttk, StringVar, DoubleVar, IntVar
 from math import sin, cos, radians, pi
+from collections import Counter, OrderedDict, namedtuple
+import ast
+from itertools import repeat
+import re
 import colorsys
+import argparse
+import struct
+import zlib
+import numpy as np
+
+try:
+    from PIL import Image, ImageTk
+except ImportError:  # without Pillow the canvas falls back to one line item per segment
+    Image = ImageTk = None
+
+# Symbols the turtle interprets, everything else only drives the rewriting
+TURTLE_COMMANDS = "Fb+-[]"
+FORWARD, MOVE, PLUS, MINUS, PUSH, POP = (ord(c) for c in "Fb+-[]")
+
+def gradient_colors(count, saturation=0.8, value=0.9, start=0, total=None):
+    """HSV hue gradient over count segments as float RGB in <0, 1>, like colorsys.hsv_to_rgb.
+
+    start and total place the segments inside a longer gradient, e.g. for one chunk of a stream.
+    """
+    hue = (start + np.arange(count)) / max(count if total is None else total, 1)
+    sector = np.floor(hue * 6.0).astype(np.int64) % 6
+    f = hue * 6.0 - np.floor(hue * 6.0)
+    p = np.full(count, value * (1.0 - saturation))
+    q = value * (1.0 - saturation * f)
+    t = value * (1.0 - saturation * (1.0 - f))
+    v = np.full(count, value)
+    channels = [(v, q, p, p, t, v), (t, v, v, q, p, p), (p, p, t, v, v, q)]
+    return np.column_stack([np.choose(sector, channel) for channel in channels]).astype(np.float32)
+
+def clip_segments(segments, width, height):
+    """Liang-Barsky clipping of (N, 4) segments to the [0, width] x [0, height] viewport"""
+    x0, y0, x1, y1 = segments.T.astype(np.float64)
+    dx, dy = x1 - x0, y1 - y0
+    t0 = np.zeros(len(segments))
+    t1 = np.ones(len(segments))
+    visible = np.ones(len(segments), dtype=bool)
+    for p, q in ((-dx, x0), (dx, width - x0), (-dy, y0), (dy, height - y0)):
+        parallel = p == 0
+        visible &= ~(parallel & (q < 0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r = np.where(parallel, 0.0, q / np.where(parallel, 1.0, p))
+        t0 = np.where(~parallel & (p < 0), np.maximum(t0, r), t0)
+        t1 = np.where(~parallel & (p > 0), np.minimum(t1, r), t1)
+    visible &= t0 <= t1
+    clipped = np.column_stack([x0 + t0 * dx, y0 + t0 * dy, x0 + t1 * dx, y0 + t1 * dy])
+    return clipped[visible], visible
+
+def rasterize_segments(segments, width, height, colors=None, background=(30, 30, 30),
+                       antialias=True, max_samples=1 << 22):
+    """Draw (N, 4) screen-space segments into a (height, width, 3) uint8 image.
+
+    Every segment is sampled at least once per pixel of its length and the
+    samples are splatted bilinearly (antialias) or to the nearest pixel, all
+    with NumPy. colors are per-segment RGB in <0, 1>, white when omitted.
+    background is an RGB color or an existing image to draw over.
+    """
+    segments, visible = clip_segments(np.asarray(segments, dtype=np.float32), width, height)
+    if colors is None:
+        colors = np.ones((len(segments), 3), dtype=np.float32)
+    else:
+        colors = np.asarray(colors, dtype=np.float32)[visible]
+
+    coverage = np.zeros(width * height)
+    color_sum = np.zeros((3, width * height))
+
+    lengths = np.ceil(np.maximum(np.abs(segments[:, 2] - segments[:, 0]),
+                                 np.abs(segments[:, 3] - segments[:, 1]))).astype(np.int64) + 1
+    # Batches of segments keep the sample arrays below max_samples
+    cumulative = np.cumsum(lengths)
+    start = 0
+    while start < len(segments):
+        done = cumulative[start - 1] if start else 0
+        end = max(int(np.searchsorted(cumulative, done + max_samples, side='right')), start + 1)
+        batch, counts, batch_colors = segments[start:end], lengths[start:end], colors[start:end]
+        start = end
+
+        owner = np.repeat(np.arange(len(batch)), counts)
+        first = np.repeat(np.cumsum(counts) - counts, counts)
+        t = (np.arange(len(owner)) - first) / np.maximum(counts[owner] - 1, 1)
+        px = batch[owner, 0] + t * (batch[owner, 2] - batch[owner, 0])
+        py = batch[owner, 1] + t * (batch[owner, 3] - batch[owner, 1])
+        # Each segment deposits about one unit of coverage per pixel of length
+        weight = np.maximum(np.hypot(batch[:, 2] - batch[:, 0], batch[:, 3] - batch[:, 1]), 1.0) / counts
+
+        if antialias:
+            fx, fy = px - 0.5, py - 0.5
+            ix, iy = np.floor(fx).astype(np.int64), np.floor(fy).astype(np.int64)
+            wx, wy = fx - ix, fy - iy
+            splats = [(ix, iy, (1 - wx) * (1 - wy)), (ix + 1, iy, wx * (1 - wy)),
+                      (ix, iy + 1, (1 - wx) * wy), (ix + 1, iy + 1, wx * wy)]
+        else:
+            splats = [(np.floor(px).astype(np.int64), np.floor(py).astype(np.int64), np.ones(len(px)))]
+
+        for sx, sy, w in splats:
+            inside = (sx >= 0) & (sx < width) & (sy >= 0) & (sy < height)
+            flat = sy[inside] * width + sx[inside]
+            w = w[inside] * weight[owner[inside]]
+            coverage += np.bincount(flat, weights=w, minlength=width * height)
+            for channel in range(3):
+                color_sum[channel] += np.bincount(flat, weights=w * batch_colors[owner[inside], channel],
+                                                  minlength=width * height)
+
+    alpha = np.minimum(coverage, 1.0)
+    color = color_sum / np.maximum(coverage, 1e-12)
+    background = np.asarray(background, dtype=np.float64) / 255.0
+    background = background[:, np.newaxis] if background.ndim == 1 else background.reshape(-1, 3).T
+    image = (alpha * color + (1 - alpha) * background) * 255.0
+    return np.clip(image, 0, 255).astype(np.uint8).T.reshape(height, width, 3)
+
+def draw_segments(canvas, segments, zoom=1.0, x_offset=0, y_offset=0, color_mode=False, raster=True):
+    """Draw world-space segments on the canvas through the zoom/offset view transform"""
+    canvas.delete("all")
+
+    # Screen position is the world position scaled by zoom and shifted by the offsets
+    segments = segments * zoom - np.array([x_offset, y_offset, x_offset, y_offset], dtype=np.float32)
+
+    if raster and Image is not None:
+        # One image item instead of a canvas line per segment
+        width = max(canvas.winfo_width(), int(canvas["width"]))
+        height = max(canvas.winfo_height(), int(canvas["height"]))
+        colors = gradient_colors(len(segments)) if color_mode else None
+        pixels = rasterize_segments(segments, width, height, colors)
+        canvas.raster_image = ImageTk.PhotoImage(Image.fromarray(pixels))
+        canvas.create_image(0, 0, image=canvas.raster_image, anchor="nw")
+        return
+
+    for i, (x0, y0, x1, y1) in enumerate(segments.tolist()):
+        if color_mode:
+            # Create color gradient based on position in the drawing
+            hue = i / len(segments)
+            rgb = colorsys.hsv_to_rgb(hue, 0.8, 0.9)
+            color = f'#{int(rgb[0]*255):02x}{int(rgb[1]*255):02x}{int(rgb[2]*255):02x}'
+        else:
+            color = "#FFFFFF"  # White
+
+        canvas.create_line(x0, y0, x1, y1, fill=color, width=1)
+
+def segment_rotation(heading):
+    """cos, sin and the matrix rotating (N, 4) segment rows by heading radians"""
+    c, s = cos(heading), sin(heading)
+    return c, s, np.array([[c, s, 0, 0], [-s, c, 0, 0], [0, 0, c, s], [0, 0, -s, c]])
+
+def balanced_brackets(text):
+    depth = 0
+    for char in text:
+        if char == "[":
+            depth += 1
+        elif char == "]":
+            depth -= 1
+            if depth < 0:
+                return False
+    return depth == 0
+
+# One rewriting rule: predecessor symbol, its parameter name (or None), relative weight and successor text
+Rule = namedtuple("Rule", "symbol variable weight successor")
+
+def split_modules(text):
+    """(symbol, parameter expression or "") pairs of a string like "F((x+1)*0.5)[+F]".
+
+    A "(" right after a symbol opens its parameter, which runs to the matching
+    ")" so the expression may contain nested parentheses. Unbalanced parentheses
+    raise ValueError instead of being read as symbols.
+    """
+    modules = []
+    i, n = 0, len(text)
+    while i < n:
+        symbol = text[i]
+        i += 1
+        if symbol.isspace():
+            continue
+        if symbol in "()":
+            raise ValueError(f"Unexpected {symbol!r} at position {i - 1} in {text!r}")
+        if i < n and text[i] == "(":
+            depth, end = 1, i + 1
+            while end < n and depth:
+                if text[end] == "(":
+                    depth += 1
+                elif text[end] == ")":
+                    depth -= 1
+                end += 1
+            if depth:
+                raise ValueError(f"Unclosed '(' at position {i} in {text!r}")
+            modules.append((symbol, text[i + 1:end - 1]))
+            i = end
+        else:
+            modules.append((symbol, ""))
+    return modules
+
+def _evaluate(node, variables):
+    """Value of a parsed arithmetic expression, only numbers, the parameter and + - * / ** are allowed"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return float(node.value)
+    if isinstance(node, ast.Name) and node.id in variables:
+        return variables[node.id]
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)):
+        value = _evaluate(node.operand, variables)
+        return -value if isinstance(node.op, ast.USub) else value
+    if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow)):
+        left, right = _evaluate(node.left, variables), _evaluate(node.right, variables)
+        if isinstance(node.op, ast.Add):
+            return left + right
+        if isinstance(node.op, ast.Sub):
+            return left - right
+        if isinstance(node.op, ast.Mult):
+            return left * right
+        if isinstance(node.op, ast.Div):
+            return left / right
+        return left ** right
+    raise ValueError(f"Unsupported parameter expression: {ast.unparse(node)}")
+
+def affine_parameter(expression, variable=None):
+    """(a, b) such that expression == a * variable + b.
+
+    Successor parameters must be affine in the predecessor's parameter, so a whole
+    string can be rewritten with one multiply-add over its parameter array.
+    """
+    try:
+        tree = ast.parse(expression, mode="eval").body
+        value = lambda x: _evaluate(tree, {} if variable is None else {variable: x})
+        b = value(0.0)
+        a = value(1.0) - b
+        if abs(value(2.0) - (2 * a + b)) > 1e-9 * max(1.0, abs(a), abs(b)):
+            raise ValueError(f"Parameter expression {expression!r} is not linear in {variable}")
+    except (SyntaxError, ZeroDivisionError, OverflowError) as error:
+        raise ValueError(f"Invalid parameter expression {expression!r}: {error}")
+    return a, b
+
+def parse_modules(text, variable=None):
+    """Symbol codes and affine parameter maps of a string like "F(x*0.5)[+F(x)]".
+
+    Symbols without a parameter get the constant 1, i.e. the plain line length.
+    """
+    codes, scale, shift = [], [], []
+    for symbol, expression in split_modules(text):
+        if ord(symbol) > 127:
+            raise ValueError(f"Only ASCII symbols are supported, got {symbol!r}")
+        a, b = (0.0, 1.0) if not expression else affine_parameter(expression, variable)
+        codes.append(ord(symbol))
+        scale.append(a)
+        shift.append(b)
+    return np.array(codes, dtype=np.uint8), np.array(scale), np.array(shift)
+
+class RuleTable:
+    """Rewriting rules compiled into lookup tables indexed by the symbol code (its byte).
+
+    The successors of all rules are stored once in a flat buffer of codes and
+    affine parameter maps, addressed per symbol and option by start and length.
+    Symbols without a rule point to a copy of themselves. Rewriting a string is
+    then a few gathers over whole arrays, with one random draw per symbol when
+    a symbol has several weighted (stochastic) options.
+    """
+    def __init__(self, axiom, rules):
+        options = {}
+        for rule in rules:
+            # Only single characters are rewritten, like the original char-by-char lookup
+            if len(rule.symbol) == 1:
+                options.setdefault(rule.symbol, []).append(rule)
+
+        self.stochastic = any(len(group) > 1 for group in options.values())
+        self.parametric = "(" in axiom or any("(" in rule.successor or rule.variable for rule in rules)
+        # Plain systems keep using str.translate, lazy expansion and instanced blocks
+        self.plain = not (self.stochastic or self.parametric)
+
+        width = max([len(group) for group in options.values()] + [1])
+        identity = np.arange(256)
+        codes, scale, shift = [identity.astype(np.uint8)], [np.ones(256)], [np.zeros(256)]
+        self.starts = np.repeat(identity[:, None], width, axis=1)
+        self.lengths = np.ones((256, width), dtype=np.int64)
+        self.cumulative = np.ones((256, width))
+        size = 256
+        for symbol, group in options.items():
+            weights = np.array([rule.weight for rule in group], dtype=float)
+            if (weights <= 0).any():
+                raise ValueError(f"Rule weights for {symbol!r} must be positive")
+            code = ord(symbol)
+            self.cumulative[code, :len(group)] = np.cumsum(weights) / weights.sum()
+            self.cumulative[code, len(group) - 1:] = 1.0
+            for option, rule in enumerate(group):
+                option_codes, option_scale, option_shift = parse_modules(rule.successor, rule.variable)
+                self.starts[code, option] = size
+                self.lengths[code, option] = len(option_codes)
+                codes.append(option_codes)
+                scale.append(option_scale)
+                shift.append(option_shift)
+                size += len(option_codes)
+        self.codes = np.concatenate(codes)
+        self.scale = np.concatenate(scale)
+        self.shift = np.concatenate(shift)
+
+        axiom_codes, _, axiom_shift = parse_modules(axiom)
+        self.axiom = (axiom_codes, axiom_shift)
+
+    def expand(self, codes, params, rng=None, max_length=None):
+        """Rewrite a whole string of codes with its parameters once"""
+        if self.stochastic:
+            rng = rng or np.random.default_rng()
+            choice = (rng.random(len(codes))[:, None] >= self.cumulative[codes]).sum(axis=1)
+        else:
+            choice = 0
+        starts = self.starts[codes, choice]
+        lengths = self.lengths[codes, choice]
+        total = int(lengths.sum())
+        if max_length is not None and total > max_length:
+            raise ValueError(f"L-system would expand to {total} symbols (limit is {max_length})")
+
+        # Position of every output symbol inside the flat successor buffer
+        firsts = np.cumsum(lengths) - lengths
+        index = np.repeat(starts - firsts, lengths) + np.arange(total)
+        return self.codes[index], self.scale[index] * np.repeat(params, lengths) + self.shift[index]
 
 class LSystemFractal:
-    def __init__(self, axiom="F", rules=None, angle=90, line_length=10, start_x=0, start_y=0, start_angle=0):
+    def __init__(self, axiom="F", rules=None, angle=90, line_length=10, start_x=0, start_y=0, start_angle=0,
+                 max_length=50_000_000, seed=None):
         self.axiom = axiom
-        self.rules = rules or {"F": "F+F-F-FF+F+F-F"}
+        rules = rules or {"F": "F+F-F-FF+F+F-F"}
+        if isinstance(rules, dict):
+            rules = [Rule(symbol, None, 1.0, replacement) for symbol, replacement in rules.items()]
+        self.rule_list = tuple(rules)
+        self.table = RuleTable(axiom, self.rule_list)
+        # Stochastic and parametric systems are rewritten through the rule table only
+        self.rules = {rule.symbol: rule.successor for rule in self.rule_list} if self.table.plain else {}
+        self.seed = seed
         self.angle = angle
         self.line_length = line_length
         self.start_x = start_x
         self.start_y = start_y
         self.start_angle = start_angle
+        self.max_length = max_length
         self.current_string = axiom
+        self.current_codes = None
+        self.current_params = None
+        self.iterations = 0
+
+        # Only single characters are rewritten, like the original char-by-char lookup
+        self.translation = str.maketrans({k: v for k, v in self.rules.items() if len(k) == 1})
+        self.translation_keys = {chr(code) for code in self.translation}
+        self.rule_counts = {symbol: Counter(replacement) for symbol, replacement in self.rules.items()}
+
+        alphabet = set(self.axiom).union(*self.rules.values(), self.translation_keys)
+        self.non_commands = str.maketrans("", "", "".join(sorted(alphabet - set(TURTLE_COMMANDS))))
+        self.leaves = {}
+
+        # Sub-derivations can be instanced as blocks when brackets never span two of them
+        self.blocks = {}
+        self.instanceable = (self.table.plain and "[" not in self.translation_keys and "]" not in self.translation_keys
+                             and all(balanced_brackets(text) for text in [axiom, *self.rules.values()]))
+
+    def expanded_counts(self, iterations, start=None):
+        """Number of each symbol in the generated string, computed without building it"""
+        counts = Counter(self.axiom if start is None else start)
+        for _ in range(iterations):
+            next_counts = Counter()
+            for symbol, count in counts.items():
+                for child, child_count in self.rule_counts.get(symbol, {symbol: 1}).items():
+                    next_counts[child] += count * child_count
+            counts = next_counts
+        return counts
+
+    def expanded_length(self, iterations, start=None):
+        """Length of the generated string, computed from symbol counts without building it"""
+        return sum(self.expanded_counts(iterations, start).values())
+
+    def check_length(self, iterations):
+        """Raise ValueError when the generated string would be longer than max_length"""
+        length = self.expanded_length(iterations)
+        if self.max_length is not None and length > self.max_length:
+            raise ValueError(f"L-system would expand to {length} symbols (limit is {self.max_length})")
+
+    def _leaf(self, symbol, depth, leaf_size=4096):
+        """Turtle commands of symbol expanded depth times, cached while shorter than leaf_size"""
+        key = (symbol, depth)
+        if key not in self.leaves:
+            leaf = None
+            if depth == 0 or self.expanded_length(depth, symbol) <= leaf_size:
+                leaf = symbol
+                for _ in range(depth):
+                    leaf = leaf.translate(self.translation)
+                leaf = leaf.translate(self.non_commands)
+            self.leaves[key] = leaf
+        return self.leaves[key]
+
+    def iter_chunks(self, iterations, chunk_size=65536):
+        """Lazy depth-first expansion yielding the turtle commands in string pieces.
+
+        Walks the derivation tree with one iterator per level, so memory grows with
+        the iteration depth and chunk size instead of the string length. Small
+        subtrees are expanded at once and cached as leaves.
+        """
+        stack = [(iter(self.axiom), iterations)]
+        pieces = []
+        size = 0
+        while stack:
+            symbol = next(stack[-1][0], None)
+            if symbol is None:
+                stack.pop()
+                continue
+
+            depth = stack[-1][1]
+            leaf = self._leaf(symbol, depth if symbol in self.translation_keys else 0)
+            if leaf is None:
+                stack.append((iter(self.rules[symbol]), depth - 1))
+                continue
+
+            pieces.append(leaf)
+            size += len(leaf)
+            if size >= chunk_size:
+                yield "".join(pieces)
+                pieces = []
+                size = 0
+        if pieces:
+            yield "".join(pieces)
+
+    def symbol_chunks(self, chunk_size=1 << 20):
+        """Pieces of the generated string, or of the lazy stream of its turtle commands"""
+        if self.current_string is None:
+            yield from self.iter_chunks(self.iterations, chunk_size)
+            return
+        for start in range(0, len(self.current_string), chunk_size):
+            yield self.current_string[start:start + chunk_size]
         
-    def generate(self, iterations):
+    def generate(self, iterations, lazy=False):
+        self.iterations = iterations
+        self.current_codes = self.current_params = None
+        if not self.table.plain:
+            # The same seed always grows the same plant
+            rng = np.random.default_rng(self.seed)
+            codes, params = self.table.axiom
+            for _ in range(iterations):
+                codes, params = self.table.expand(codes, params, rng, self.max_length)
+            self.current_string = None
+            self.current_codes, self.current_params = codes, params
+            return codes.tobytes().decode("ascii")
+
+        if lazy:
+            self.current_string = None
+            return None
+
+        self.check_length(iterations)
+
+        # str.translate rewrites the whole string in C, one pass per iteration
         result = self.axiom
         for _ in range(iterations):
-            next_result = ""
-            for char in result:
-                next_result += self.rules.get(char, char)
-            result = next_result
+            result = result.translate(self.translation)
         self.current_string = result
         return result
     
-    def get_bounds(self):
-        """Calculate the bounds of the fractal to assist with scaling"""
-        x, y = self.start_x, self.start_y
-        angle = radians(self.start_angle)
-        min_x, max_x = x, x
-        min_y, max_y = y, y
-        stack = []
-        
-        for char in self.current_string:
-            if char == 'F':
-                x += self.line_length * cos(angle)
-                y += self.line_length * sin(angle)
-                min_x = min(min_x, x)
-                max_x = max(max_x, x)
-                min_y = min(min_y, y)
-                max_y = max(max_y, y)
-            elif char == 'b':
-                x += self.line_length * cos(angle)
-                y += self.line_length * sin(angle)
+    def _interpret(self, chunk, state, params=None):
+        """Segments (x0, y0, x1, y1) drawn by a piece of turtle commands, continuing from state.
+
+        chunk is a string or an array of symbol codes, params optionally scales
+        the line length per symbol. The heading is kept as a whole number of
+        turns, so without brackets the headings and positions of the whole piece
+        come from cumulative sums. With brackets the piece is walked with an
+        explicit stack instead.
+        """
+        start_heading = radians(self.start_angle)
+        turn = radians(self.angle)
+        if isinstance(chunk, str):
+            codes = None
+            brackets = "[" in chunk or "]" in chunk
+        else:
+            codes = chunk
+            brackets = bool(((codes == PUSH) | (codes == POP)).any())
+            chunk = codes.tobytes().decode("ascii")
+
+        if not brackets:
+            if codes is None:
+                codes = np.frombuffer(chunk.encode("ascii", "replace"), dtype=np.uint8)
+            turns = state.turns + np.cumsum((codes == PLUS).astype(np.int64) - (codes == MINUS))
+            moves = (codes == FORWARD) | (codes == MOVE)
+            if not moves.any():
+                state.turns = int(turns[-1]) if len(turns) else state.turns
+                return np.empty((0, 4), dtype=np.float32)
+
+            headings = start_heading + turns[moves] * turn
+            lengths = self.line_length if params is None else self.line_length * params[moves]
+            xs = state.x + np.cumsum(lengths * np.cos(headings))
+            ys = state.y + np.cumsum(lengths * np.sin(headings))
+            drawn = codes[moves] == FORWARD
+            segments = np.column_stack([
+                np.concatenate([[state.x], xs[:-1]])[drawn],
+                np.concatenate([[state.y], ys[:-1]])[drawn],
+                xs[drawn],
+                ys[drawn],
+            ]).astype(np.float32)
+            state.x, state.y, state.turns = float(xs[-1]), float(ys[-1]), int(turns[-1])
+            return segments
+
+        steps = state.steps
+        x, y, turns, stack = state.x, state.y, state.turns, state.stack
+        coords = []
+        factors = repeat(1.0) if params is None else params.tolist()
+        for char, factor in zip(chunk, factors):
+            if char == 'F' or char == 'b':
+                step = steps.get(turns)
+                if step is None:
+                    heading = start_heading + turns * turn
+                    step = steps[turns] = (self.line_length * cos(heading), self.line_length * sin(heading))
+                new_x, new_y = x + step[0] * factor, y + step[1] * factor
+                if char == 'F':
+                    coords.extend((x, y, new_x, new_y))
+                x, y = new_x, new_y
             elif char == '+':
-                angle += radians(self.angle)
+                turns += 1
             elif char == '-':
-                angle -= radians(self.angle)
+                turns -= 1
             elif char == '[':
-                stack.append((x, y, angle))
+                stack.append((x, y, turns))
             elif char == ']':
                 if stack:
-                    x, y, angle = stack.pop()
-        
-        return min_x, min_y, max_x, max_y
-        
-    def draw(self, canvas, zoom=1.0, x_offset=0, y_offset=0, color_mode=False):
-        canvas.delete("all")
-        
-        # Calculate starting position based on zoom and offsets
-        x = self.start_x * zoom - x_offset
-        y = self.start_y * zoom - y_offset
-        angle = radians(self.start_angle)
+                    x, y, turns = stack.pop()
+        state.x, state.y, state.turns = x, y, turns
+        return np.array(coords, dtype=np.float32).reshape(-1, 4)
+
+    def _block(self, symbol, depth):
+        """Memoised geometry of symbol expanded depth times, in its own frame.
+
+        A block is (segments starting at the origin with heading 0, net displacement,
+        net turns). Expanding a symbol one level deeper only places the blocks of
+        its rule's symbols, instead of re-deriving and re-interpreting the string.
+        """
+        key = (symbol, depth)
+        if key not in self.blocks:
+            if depth > 0 and symbol in self.translation_keys:
+                self.blocks[key] = self._assemble(self.rules[symbol], depth - 1)
+            elif symbol == "F":
+                self.blocks[key] = (np.array([[0.0, 0.0, self.line_length, 0.0]]), (self.line_length, 0.0), 0)
+            elif symbol == "b":
+                self.blocks[key] = (np.empty((0, 4)), (self.line_length, 0.0), 0)
+            else:
+                self.blocks[key] = (np.empty((0, 4)), (0.0, 0.0), {"+": 1, "-": -1}.get(symbol, 0))
+        return self.blocks[key]
+
+    def _assemble(self, text, depth):
+        """Block of a bracket-balanced string whose symbols are expanded depth times"""
+        pieces = []
+        x, y, turns = 0.0, 0.0, 0
         stack = []
+        for char in text:
+            if char == "[":
+                stack.append((x, y, turns))
+            elif char == "]":
+                x, y, turns = stack.pop()
+            else:
+                segments, (dx, dy), block_turns = self._block(char, depth)
+                c, s, rotation = segment_rotation(turns * radians(self.angle))
+                if len(segments):
+                    pieces.append(segments @ rotation + (x, y, x, y))
+                x, y = x + c * dx - s * dy, y + s * dx + c * dy
+                turns += block_turns
+        segments = np.concatenate(pieces) if pieces else np.empty((0, 4))
+        return segments, (x, y), turns
+
+    def instanced_segments(self):
+        """Segments assembled from memoised sub-derivation blocks, no string is built"""
+        segments = self._assemble(self.axiom, self.iterations)[0]
+        # The start pose is applied once to the whole drawing
+        _, _, rotation = segment_rotation(radians(self.start_angle))
+        start = (self.start_x, self.start_y, self.start_x, self.start_y)
+        return (segments @ rotation + start).astype(np.float32)
+
+    def iter_segments(self, chunk_size=1 << 20):
+        """Segment arrays of the generated fractal, one per piece of the string"""
+        state = TurtleState(self.start_x, self.start_y)
+        if self.current_codes is not None:
+            for start in range(0, len(self.current_codes), chunk_size):
+                end = start + chunk_size
+                yield self._interpret(self.current_codes[start:end], state, self.current_params[start:end])
+            return
+        for chunk in self.symbol_chunks(chunk_size):
+            yield self._interpret(chunk, state)
+
+    def segment_count(self):
+        """Number of segments the last generated fractal draws"""
+        if self.current_codes is not None:
+            return int(np.count_nonzero(self.current_codes == FORWARD))
+        return self.expanded_counts(self.iterations)["F"]
+
+    def segments(self):
+        """All drawn segments as a float32 (N, 4) array of (x0, y0, x1, y1)"""
+        if self.instanceable:
+            return self.instanced_segments()
+        chunks = list(self.iter_segments())
+        return np.concatenate(chunks) if chunks else np.empty((0, 4), dtype=np.float32)
+    
+    def get_bounds(self):
+        """Calculate the bounds of the fractal to assist with scaling"""
+        min_x, max_x = self.start_x, self.start_x
+        min_y, max_y = self.start_y, self.start_y
+        for segments in self.iter_segments():
+            if len(segments):
+                min_x = min(min_x, float(segments[:, 0::2].min()))
+                max_x = max(max_x, float(segments[:, 0::2].max()))
+                min_y = min(min_y, float(segments[:, 1::2].min()))
+                max_y = max(max_y, float(segments[:, 1::2].max()))
+        return min_x, min_y, max_x, max_y
         
-        line_length = self.line_length * zoom
-        
-        # For color gradient based on depth
-        depth = 0
-        max_depth = 0
-        for char in self.current_string:
-            if char == '[':
-                depth += 1
-                max_depth = max(max_depth, depth)
-            elif char == ']':
-                depth -= 1
-        
-        # Draw the L-system
-        depth = 0
-        for i, char in enumerate(self.current_string):
-            if char == 'F':
-                old_x, old_y = x, y
-                x += line_length * cos(angle)
-                y += line_length * sin(angle)
-                
+    def draw(self, canvas, zoom=1.0, x_offset=0, y_offset=0, color_mode=False, raster=True):
+        draw_segments(canvas, self.segments(), zoom, x_offset, y_offset, color_mode, raster)
+
+class TurtleState:
+    """Turtle position, heading (in whole turns) and bracket stack carried between string pieces"""
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.turns = 0
+        self.stack = []
+        self.steps = {}
+
+PREDEFINED_SYSTEMS = {
+    "Koch Snowflake": {
+        "axiom": "F+F+F+F",
+        "rule": "F -> F+F-F-FF+F+F-F",
+        "angle": 90
+    },
+    "Koch Curve": {
+        "axiom": "F++F++F",
+        "rule": "F -> F+F--F+F",
+        "angle": 60
+    },
+    "Plant": {
+        "axiom": "F",
+        "rule": "F -> F[+F]F[-F]F",
+        "angle": 180 * (pi/7) / pi  # Converting radians to degrees
+    },
+    "Bush": {
+        "axiom": "F",
+        "rule": "F -> FF+[+F-F-F]-[-F+F+F]",
+        "angle": 180 * (pi/8) / pi  # Converting radians to degrees
+    },
+    "Dragon Curve": {
+        "axiom": "FX",
+        "rule": "X -> X+YF+; Y -> -FX-Y",
+        "angle": 90
+    },
+    "Stochastic Plant": {
+        "axiom": "F",
+        "rule": "F : 0.34 -> F[+F]F[-F]F; F : 0.33 -> F[+F]F; F : 0.33 -> F[-F]F",
+        "angle": 25.7
+    },
+    "Parametric Tree": {
+        "axiom": "X(1)",
+        "rule": "X(x) -> F(x)[+X(x*0.7)][-X(x*0.7)]",
+        "angle": 25
+    }
+}
+
+def parse_rules(rules_text):
+    """Rules separated by ';' or new lines.
+
+    "F -> FF" rewrites F, "F : 0.3 -> F[+F]" gives F several options chosen with
+    the given weights, and "F(x) -> F(x*0.5)[+F(x)]" passes a parameter scaling
+    the line length. Text without "->" is the replacement of F.
+    """
+    rules = []
+    for part in re.split(r"[;\n]", rules_text):
+        if not part.strip():
+            continue
+        if "->" not in part:
+            rules.append(Rule("F", None, 1.0, part.strip()))
+            continue
+        head, successor = part.split("->", 1)
+        head, _, weight = head.partition(":")
+        match = re.fullmatch(r"\s*(\S)\s*(?:\(\s*([A-Za-z_]\w*)\s*\))?\s*", head)
+        if match is None:
+            raise ValueError(f"Invalid rule predecessor: {head.strip()!r}")
+        try:
+            weight = float(weight) if weight.strip() else 1.0
+        except ValueError:
+            raise ValueError(f"Invalid rule weight: {weight.strip()!r}")
+        rules.append(Rule(match.group(1), match.group(2), weight, successor.strip()))
+    return rules
+
+def _export_transform(l_system, iterations, width, margin):
+    """Lazily generate the system and find the scale/offset fitting it into width pixels"""
+    l_system.generate(iterations, lazy=True)
+    min_x, min_y, max_x, max_y = l_system.get_bounds()
+    # The drawing spans the full width, a vertical line falls back to its height
+    extent = max_x - min_x if max_x - min_x > 1e-9 else max(max_y - min_y, 1e-9)
+    scale = (width - 2 * margin) / extent
+    height = int(np.ceil((max_y - min_y) * scale)) + 2 * margin
+    offset = np.array([min_x, min_y, min_x, min_y]) * scale - margin
+    return scale, offset, height
+
+def export_svg(l_system, iterations, path, width=2000, margin=10, stroke="#000000", background="#FFFFFF",
+               precision=2):
+    """Stream the fractal into an SVG file without materialising the string or all segments.
+
+    Connected segments share their points, a new subpath only starts where the
+    turtle jumped (after ']' or 'b').
+    """
+    def number(value):
+        # Fixed point keeps the requested decimals for large coordinates too, :g would round to 6 digits
+        text = f"{value:.{precision}f}"
+        return text.rstrip("0").rstrip(".") if "." in text else text
+
+    scale, offset, height = _export_transform(l_system, iterations, width, margin)
+    with open(path, "w") as f:
+        f.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+                f'viewBox="0 0 {width} {height}">\n')
+        f.write(f'<rect width="100%" height="100%" fill="{background}"/>\n')
+
+        for segments in l_system.iter_segments():
+            if not len(segments):
+                continue
+            # Adding 0.0 turns -0.0 into 0.0
+            points = np.round(segments * scale - offset, precision) + 0.0
+            starts, ends = points[:, :2], points[:, 2:]
+            jumps = np.ones(len(points), dtype=bool)
+            jumps[1:] = np.any(starts[1:] != ends[:-1], axis=1)
+
+            # After "M x y" further coordinate pairs are implicit line-to commands
+            parts = []
+            for jump, (x0, y0), (x1, y1) in zip(jumps.tolist(), starts.tolist(), ends.tolist()):
+                if jump:
+                    parts.append(f"M{number(x0)} {number(y0)}")
+                parts.append(f"{number(x1)} {number(y1)}")
+            f.write(f'<path fill="none" stroke="{stroke}" stroke-width="1" d="{" ".join(parts)}"/>\n')
+        f.write("</svg>\n")
+
+def _png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+def export_png(l_system, iterations, path, width=4000, margin=10, tile_height=512, color_mode=False,
+               stroke=(0, 0, 0), background=(255, 255, 255)):
+    """Render the fractal into a large PNG band by band.
+
+    Each band of tile_height rows is rasterised from a fresh stream of segments
+    and compressed straight into the file, so memory is bounded by one band
+    instead of the whole image.
+    """
+    scale, offset, height = _export_transform(l_system, iterations, width, margin)
+    total = l_system.segment_count()
+    compressor = zlib.compressobj(6)
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(_png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+
+        for top in range(0, height, tile_height):
+            rows = min(tile_height, height - top)
+            # One halo row on each side so antialiasing does not leave seams between bands
+            band_offset = offset + np.array([0, top - 1, 0, top - 1])
+            band = np.empty((rows + 2, width, 3), dtype=np.uint8)
+            band[:] = background
+            index = 0
+            for segments in l_system.iter_segments():
+                screen = segments * scale - band_offset
+                # Only segments crossing this band are rasterised
+                in_band = (np.maximum(screen[:, 1], screen[:, 3]) >= 0) & (np.minimum(screen[:, 1], screen[:, 3]) <= rows + 2)
                 if color_mode:
-                    # Create color gradient based on position in string
-                    hue = i / len(self.current_string)
-                    rgb = colorsys.hsv_to_rgb(hue, 0.8, 0.9)
-                    color = f'#{int(rgb[0]*255):02x}{int(rgb[1]*255):02x}{int(rgb[2]*255):02x}'
+                    colors = gradient_colors(len(segments), start=index, total=total)[in_band]
                 else:
-                    color = "#FFFFFF"  # White
-                
-                canvas.create_line(old_x, old_y, x, y, fill=color, width=1)
-            elif char == 'b':
-                x += line_length * cos(angle)
-                y += line_length * sin(angle)
-            elif char == '+':
-                angle += radians(self.angle)
-            elif char == '-':
-                angle -= radians(self.angle)
-            elif char == '[':
-                stack.append((x, y, angle))
-                depth += 1
-            elif char == ']':
-                if stack:
-                    x, y, angle = stack.pop()
-                    depth -= 1
+                    colors = np.tile(np.array(stroke, dtype=np.float32) / 255, (int(in_band.sum()), 1))
+                index += len(segments)
+                if in_band.any():
+                    # Later chunks are drawn over the earlier ones
+                    band = rasterize_segments(screen[in_band], width, rows + 2, colors, band)
+
+            rows_bytes = np.concatenate([np.zeros((rows, 1), dtype=np.uint8),
+                                         band[1:rows + 1].reshape(rows, -1)], axis=1)
+            data = compressor.compress(rows_bytes.tobytes())
+            if data:
+                f.write(_png_chunk(b"IDAT", data))
+
+        f.write(_png_chunk(b"IDAT", compressor.flush()))
+        f.write(_png_chunk(b"IEND", b""))
 
 class App:
     def __init__(self, root):
@@ -115,30 +781,7 @@ class App:
         self.root.geometry("1200x800")
         self.setup_styles()
         
-        self.predefined_systems = {
-            "Koch Snowflake": {
-                "axiom": "F+F+F+F",
-                "rule": "F -> F+F-F-FF+F+F-F",
-                "angle": 90
-            },
-            "Koch Curve": {
-                "axiom": "F++F++F",
-                "rule": "F -> F+F--F+F",
-                "angle": 60
-            },
-            "Plant": {
-                "axiom": "F",
-                "rule": "F -> F[+F]F[-F]F",
-                "angle": 180 * (pi/7) / pi  # Converting radians to degrees
-            },
-            "Bush": {
-                "axiom": "F",
-                "rule": "F -> FF+[+F-F-F]-[-F+F+F]",
-                "angle": 180 * (pi/8) / pi  # Converting radians to degrees
-            }
-        }
-
-
+        self.predefined_systems = PREDEFINED_SYSTEMS
 
         # Variables
         self.axiom_var = StringVar(value="F+F+F+F")
@@ -149,6 +792,7 @@ class App:
         self.start_x_var = IntVar(value=600)
         self.start_y_var = IntVar(value=400)
         self.start_angle_var = IntVar(value=0)
+        self.seed_var = StringVar(value="0")
         
         # Zooming and panning
         self.zoom = 1.0
@@ -158,6 +802,11 @@ class App:
         self.last_x = 0
         self.last_y = 0
         self.color_mode = False
+
+        # Expanded geometry of recently drawn L-systems, pan/zoom only changes the view
+        self.geometry_cache = OrderedDict()
+        self.geometry_cache_size = 8
+        self.segments = np.empty((0, 4), dtype=np.float32)
         
         # Main frame
         main_frame = ttk.Frame(root)
@@ -184,7 +833,7 @@ class App:
         # Initialize fractal
         self.l_system = LSystemFractal(
             axiom=self.axiom_var.get(),
-            rules=self.parse_rule(self.rule_var.get()),
+            rules=parse_rules(self.rule_var.get()),
             angle=self.angle_var.get(),
             line_length=self.line_length_var.get(),
             start_x=self.start_x_var.get(),
@@ -232,7 +881,7 @@ class App:
         axiom_entry = ttk.Entry(parent, textvariable=self.axiom_var, width=25)
         axiom_entry.grid(row=3, column=0, sticky="ew", pady=(0, 5))
         
-        ttk.Label(parent, text="Rule (F -> ...):").grid(row=4, column=0, sticky="w")
+        ttk.Label(parent, text="Rules (F -> ...; X -> ...):").grid(row=4, column=0, sticky="w")
         rule_entry = ttk.Entry(parent, textvariable=self.rule_var, width=25)
         rule_entry.grid(row=5, column=0, sticky="ew", pady=(0, 5))
         
@@ -262,67 +911,118 @@ class App:
         
         ttk.Label(parent, text="Start Angle:").grid(row=16, column=0, sticky="w")
         start_angle_entry = ttk.Entry(parent, textvariable=self.start_angle_var, width=25)
-        start_angle_entry.grid(row=17, column=0, sticky="ew", pady=(0, 10))
+        start_angle_entry.grid(row=17, column=0, sticky="ew", pady=(0, 5))
+
+        # Seed of stochastic rules, empty means a new random plant
+        ttk.Label(parent, text="Seed:").grid(row=18, column=0, sticky="w")
+        seed_entry = ttk.Entry(parent, textvariable=self.seed_var, width=25)
+        seed_entry.grid(row=19, column=0, sticky="ew", pady=(0, 10))
         
         # Color mode
         self.color_var = tk.BooleanVar(value=False)
         color_check = ttk.Checkbutton(parent, text="Color Mode", variable=self.color_var, command=self.toggle_color)
-        color_check.grid(row=18, column=0, sticky="w", pady=(0, 10))
+        color_check.grid(row=20, column=0, sticky="w", pady=(0, 10))
+
+        # Lazy expansion streams the string instead of building it
+        self.lazy_var = tk.BooleanVar(value=False)
+        lazy_check = ttk.Checkbutton(parent, text="Lazy Expansion", variable=self.lazy_var)
+        lazy_check.grid(row=21, column=0, sticky="w", pady=(0, 10))
+
+        # Raster rendering draws one image instead of a canvas item per line (needs Pillow)
+        self.raster_var = tk.BooleanVar(value=Image is not None)
+        raster_check = ttk.Checkbutton(parent, text="Raster Rendering", variable=self.raster_var, command=self.render)
+        raster_check.grid(row=22, column=0, sticky="w", pady=(0, 10))
         
         # Generate button
         generate_btn = ttk.Button(parent, text="Generate Fractal", command=self.redraw)
-        generate_btn.grid(row=19, column=0, sticky="ew", pady=10)
+        generate_btn.grid(row=23, column=0, sticky="ew", pady=10)
         
         # Reset zoom/position button
         reset_btn = ttk.Button(parent, text="Reset View", command=self.reset_view)
-        reset_btn.grid(row=20, column=0, sticky="ew")
+        reset_btn.grid(row=24, column=0, sticky="ew")
         
         # Help text
-        help_text = "L-System Controls:\nF = Draw forward\nb = Move forward (no line)\n+ = Turn right\n- = Turn left\n[ = Save position\n] = Restore position"
+        help_text = "L-System Controls:\nF = Draw forward\nb = Move forward (no line)\n+ = Turn right\n- = Turn left\n[ = Save position\n] = Restore position\n\nRules: \"F : 0.5 -> ...\" is chosen with weight 0.5, \"F(x) -> F(x*0.5)\" scales the line length"
         help_label = ttk.Label(parent, text=help_text, justify="left", wraplength=200)
-        help_label.grid(row=21, column=0, sticky="w", pady=(20, 0))
+        help_label.grid(row=25, column=0, sticky="w", pady=(20, 0))
     
     def parse_rule(self, rule_text):
-        try:
-            parts = rule_text.split("->")
-            symbol = parts[0].strip()
-            replacement = parts[1].strip()
-            return {symbol: replacement}
-        except:
-            return {"F": rule_text.strip()}
+        return parse_rules(rule_text)
     
     def load_predefined(self, event):
         selected = self.fractal_combo.get()
         if selected in self.predefined_systems:
             system = self.predefined_systems[selected]
             self.axiom_var.set(system["axiom"])
-            self.rule_var.set(f"F -> {system['rule'].split('->')[1].strip()}" 
-                              if "->" in system["rule"] else f"F -> {system['rule']}")
+            self.rule_var.set(system["rule"] if "->" in system["rule"] else f"F -> {system['rule']}")
             self.angle_var.set(system["angle"])
-            self.reset_view()
+            self.reset_view(render=False)
             self.redraw()
     
     def toggle_color(self):
         self.color_mode = self.color_var.get()
-        self.redraw()
+        self.render()
     
     def redraw(self):
         # Update L-system parameters
-        self.l_system = LSystemFractal(
-            axiom=self.axiom_var.get(),
-            rules=self.parse_rule(self.rule_var.get()),
-            angle=self.angle_var.get(),
-            line_length=self.line_length_var.get(),
-            start_x=self.start_x_var.get(),
-            start_y=self.start_y_var.get(),
-            start_angle=self.start_angle_var.get()
-        )
-        
-        # Generate the L-system string
-        self.l_system.generate(self.iterations_var.get())
+        try:
+            # Empty seed means a new random plant, the chosen seed is shown so it can be reproduced
+            seed_text = self.seed_var.get().strip()
+            if seed_text:
+                seed = int(seed_text)
+            else:
+                seed = int(np.random.default_rng().integers(2**31))
+                self.seed_var.set(str(seed))
+
+            self.l_system = LSystemFractal(
+                axiom=self.axiom_var.get(),
+                rules=self.parse_rule(self.rule_var.get()),
+                angle=self.angle_var.get(),
+                line_length=self.line_length_var.get(),
+                start_x=self.start_x_var.get(),
+                start_y=self.start_y_var.get(),
+                start_angle=self.start_angle_var.get(),
+                seed=seed
+            )
+        except ValueError as error:
+            self.show_error(error)
+            return
+        iterations = self.iterations_var.get()
+        key = (self.l_system.axiom, self.l_system.rule_list, self.l_system.angle, iterations,
+               self.l_system.line_length, self.l_system.start_x, self.l_system.start_y, self.l_system.start_angle,
+               seed if self.l_system.table.stochastic else None)
+
+        if key in self.geometry_cache:
+            self.geometry_cache.move_to_end(key)
+        else:
+            # Generate the L-system string
+            try:
+                if self.l_system.instanceable:
+                    # Instanced geometry is assembled from memoized blocks and never needs the string
+                    self.l_system.check_length(iterations)
+                    self.l_system.generate(iterations, lazy=True)
+                else:
+                    self.l_system.generate(iterations, lazy=self.lazy_var.get())
+            except ValueError as error:
+                self.show_error(error)
+                return
+            self.geometry_cache[key] = self.l_system.segments()
+            if len(self.geometry_cache) > self.geometry_cache_size:
+                self.geometry_cache.popitem(last=False)
+        self.segments = self.geometry_cache[key]
         
         # Draw the L-system
-        self.l_system.draw(self.canvas, self.zoom, self.x_offset, self.y_offset, self.color_mode)
+        self.render()
+
+    def show_error(self, error):
+        print(error)
+        self.canvas.delete("all")
+        self.canvas.create_text(20, 20, text=str(error), fill="#FF6666", anchor="nw")
+
+    def render(self):
+        """Draw the cached geometry with the current zoom and offsets"""
+        draw_segments(self.canvas, self.segments, self.zoom, self.x_offset, self.y_offset, self.color_mode,
+                      self.raster_var.get())
     
     def start_drag(self, event):
         self.dragging = True
@@ -342,10 +1042,14 @@ class App:
         self.last_x = event.x
         self.last_y = event.y
         
-        self.redraw()
+        # Panning just moves what is already drawn
+        self.canvas.move("all", dx, dy)
     
     def stop_drag(self, event):
         self.dragging = False
+        if self.raster_var.get():
+            # The moved image does not cover newly exposed parts of the canvas
+            self.render()
     
     def zoom_wheel(self, event):
         """Handle mousewheel zoom on Windows"""
@@ -354,17 +1058,21 @@ class App:
             self.zoom_in(event)
         else:
             self.zoom_out(event)
+
+    def zoom_at(self, x, y, factor):
+        """Scale the view by factor keeping the canvas point (x, y) in place"""
+        self.zoom *= factor
+        self.x_offset = (self.x_offset + x) * factor - x
+        self.y_offset = (self.y_offset + y) * factor - y
+
+        if self.raster_var.get():
+            self.render()
+        else:
+            self.canvas.scale("all", x, y, factor, factor)
     
     def zoom_in(self, event):
         """Zoom in - ensure we zoom around the mouse position"""
-        old_zoom = self.zoom
-        self.zoom *= 1.2
-        
-        # Adjust offset to zoom around mouse position
-        self.x_offset = event.x + (self.x_offset - event.x) * (self.zoom / old_zoom)
-        self.y_offset = event.y + (self.y_offset - event.y) * (self.zoom / old_zoom)
-        
-        self.redraw()
+        self.zoom_at(event.x, event.y, 1.2)
         return "break"  # Prevent event propagation
     
     def zoom_out(self, event):
@@ -372,24 +1080,47 @@ class App:
         if self.zoom <= 0.1:
             return "break"
         
-        old_zoom = self.zoom
-        self.zoom /= 1.2
-        
-        # Adjust offset to zoom around mouse position
-        self.x_offset = event.x + (self.x_offset - event.x) * (self.zoom / old_zoom)
-        self.y_offset = event.y + (self.y_offset - event.y) * (self.zoom / old_zoom)
-        
-        self.redraw()
+        self.zoom_at(event.x, event.y, 1 / 1.2)
         return "break"  # Prevent event propagation
     
-    def reset_view(self):
+    def reset_view(self, render=True):
         """Reset zoom and position"""
         self.zoom = 1.0
         self.x_offset = 0
         self.y_offset = 0
-        self.redraw()
+        if render:
+            self.render()
 
 def main():
+    parser = argparse.ArgumentParser(description="L-System fractal generator")
+    parser.add_argument("--export", metavar="PATH",
+                        help="render headless into an .svg or .png file instead of opening the window")
+    parser.add_argument("--preset", choices=list(PREDEFINED_SYSTEMS), default="Koch Snowflake")
+    parser.add_argument("--axiom", help="overrides the preset axiom")
+    parser.add_argument("--rule", help="overrides the preset rules, e.g. \"F -> F+F-F\" or \"X -> X+YF+; Y -> -FX-Y\"")
+    parser.add_argument("--angle", type=float, help="overrides the preset angle (degrees)")
+    parser.add_argument("--iterations", type=int, default=4)
+    parser.add_argument("--width", type=int, default=4000, help="output width in pixels")
+    parser.add_argument("--color", action="store_true", help="color gradient (PNG only)")
+    parser.add_argument("--seed", type=int, help="seed of stochastic rules")
+    args = parser.parse_args()
+
+    if args.export:
+        system = PREDEFINED_SYSTEMS[args.preset]
+        l_system = LSystemFractal(
+            axiom=args.axiom or system["axiom"],
+            rules=parse_rules(args.rule or system["rule"]),
+            angle=system["angle"] if args.angle is None else args.angle,
+            line_length=1,
+            seed=args.seed
+        )
+        if args.export.endswith(".svg"):
+            export_svg(l_system, args.iterations, args.export, args.width)
+        else:
+            export_png(l_system, args.iterations, args.export, args.width, color_mode=args.color)
+        print(f"Saved {args.export}")
+        return
+
     root = tk.Tk()
     app = App(root)
     root.mainloop()
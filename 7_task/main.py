@@ -1,33 +1,411 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
 import numpy as np
 import plotly.graph_objects as go
-import random
-
-def apply_transform(point, transform):
-    x, y, z = point
-    a, b, c, d, e, f, g, h, i, j, k, l = transform
-    
-    new_x = a * x + b * y + c * z + j
-    new_y = d * x + e * y + f * z + k
-    new_z = g * x + h * y + i * z + l
-    
-    return (new_x, new_y, new_z)
+
+def transforms_to_affine(transforms):
+    """Stack 12-parameter transforms into a (k, 3, 4) array of [A | t] affine matrices"""
+    params = np.asarray(transforms, dtype=np.float64)
+    affine = np.empty((len(params), 3, 4))
+    affine[:, :, :3] = params[:, :9].reshape(-1, 3, 3)
+    affine[:, :, 3] = params[:, 9:12]
+    return affine
+
+def determinant_weights(transforms, floor=0.01):
+    """Sampling probabilities proportional to |det| of each transform's linear part.
+
+    The determinant is the volume scale of the transform, so each piece of the
+    attractor gets samples proportional to its size. Every transform keeps at
+    least `floor` so degenerate pieces (e.g. the flat stem) are still drawn.
+    """
+    det = np.abs(np.linalg.det(transforms_to_affine(transforms)[:, :, :3]))
+    weights = det / det.sum() if det.sum() > 0 else np.full(len(det), 1.0 / len(det))
+    weights = np.maximum(weights, floor)
+    return weights / weights.sum()
+
+def resolve_probabilities(transforms, probabilities=None):
+    """Normalized probabilities, None means uniform and "determinant" means determinant_weights"""
+    if probabilities is None:
+        return np.full(len(transforms), 1.0 / len(transforms))
+    if isinstance(probabilities, str):
+        if probabilities != "determinant":
+            raise ValueError(f"Unknown probability weighting: {probabilities}")
+        return determinant_weights(transforms)
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    return probabilities / probabilities.sum()
+
+class ChaosGame:
+    """Vectorized chaos game running many independent walkers at once.
+
+    Every step applies a randomly chosen transform to all walkers in one NumPy
+    operation, so each step produces `walkers` points of the attractor.
+    """
+    def __init__(self, transforms, probabilities=None, walkers=4096, warmup=20, seed=None, start_point=(0, 0, 0)):
+        self.affine = transforms_to_affine(transforms)
+        k = len(self.affine)
+        self.probabilities = resolve_probabilities(transforms, probabilities)
+        self.rng = np.random.default_rng(seed)
+        self.state = np.tile(np.asarray(start_point, dtype=np.float64), (walkers, 1))
+
+        # Discard the transient from the start point before recording anything
+        for idx in self.rng.choice(k, size=(warmup, walkers), p=self.probabilities):
+            self._step(idx)
+
+    @property
+    def walkers(self):
+        return len(self.state)
+
+    def _step(self, idx):
+        selected = self.affine[idx]
+        self.state = np.einsum('wij,wj->wi', selected[:, :, :3], self.state) + selected[:, :, 3]
+        return self.state
+
+    def run(self, n_points, out=None):
+        """Fill a float32 (n_points, 3) buffer with attractor points"""
+        if out is None:
+            out = np.empty((n_points, 3), dtype=np.float32)
+        steps = -(-n_points // self.walkers)
+
+        # All transform indices for the run are drawn at once
+        indices = self.rng.choice(len(self.affine), size=(steps, self.walkers), p=self.probabilities)
+        for step, idx in enumerate(indices):
+            start = step * self.walkers
+            stop = min(start + self.walkers, n_points)
+            out[start:stop] = self._step(idx)[:stop - start]
+        return out
+
+    def iter_chunks(self, n_points=None, chunk_size=1000000):
+        """Yield float32 (chunk_size, 3) arrays of points, forever when n_points is None.
+
+        Only one chunk is alive at a time unless the consumer keeps references,
+        so any number of points can be streamed in constant memory.
+        """
+        remaining = n_points
+        while remaining is None or remaining > 0:
+            n = chunk_size if remaining is None else min(chunk_size, remaining)
+            yield self.run(n)
+            if remaining is not None:
+                remaining -= n
+
+def iter_fractal_points(transforms, probabilities=None, n_points=None, chunk_size=1000000,
+                        warmup=20, walkers=4096, seed=None, start_point=(0, 0, 0)):
+    """Streaming chaos game, discards `warmup` steps of every walker and yields point chunks"""
+    game = ChaosGame(transforms, probabilities, walkers=walkers, warmup=warmup, seed=seed, start_point=start_point)
+    return game.iter_chunks(n_points, chunk_size)
 
 def generate_fractal(transforms, probabilities, iterations=50000, start_point=(0, 0, 0)):
-    points = [start_point]
-    current_point = start_point
-    
+    points = ChaosGame(transforms, probabilities, start_point=start_point).run(iterations)
+    return points[:, 0], points[:, 1], points[:, 2]
+
+def _sample_chain(task):
+    """Worker of sample_parallel, fills rows [start, stop) of the shared output"""
+    target, n_points, start, stop, transforms, probabilities, seed_sequence, walkers, warmup = task
+    if isinstance(target, str):
+        shm = None
+        out = np.load(target, mmap_mode='r+')
+    else:
+        shm = shared_memory.SharedMemory(name=target[0])
+        out = np.ndarray((n_points, 3), dtype=np.float32, buffer=shm.buf)
+    try:
+        game = ChaosGame(transforms, probabilities, walkers=walkers, warmup=warmup, seed=seed_sequence)
+        game.run(stop - start, out=out[start:stop])
+        if shm is None:
+            out.flush()
+    finally:
+        del out
+        if shm is not None:
+            shm.close()
+    return stop - start
+
+def sample_parallel(transforms, probabilities, n_points, chains=16, workers=None, seed=None,
+                    warmup=20, walkers=4096, path=None):
+    """Run independent chaos game chains in a process pool and merge them into one array.
+
+    Every chain gets its own child of SeedSequence(seed) and its own warm-up, so
+    the result only depends on seed and chains, not on the number of workers.
+    With path the chains write into a memory-mapped .npy file which is returned,
+    otherwise into shared memory that is copied into a regular array.
+    """
+    seed_sequences = np.random.SeedSequence(seed).spawn(chains)
+    bounds = np.linspace(0, n_points, chains + 1).astype(np.int64)
+    transforms = np.asarray(transforms, dtype=np.float64).tolist()
+    probabilities = resolve_probabilities(transforms, probabilities).tolist()
+
+    shm = None
+    if path is not None:
+        out = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=(n_points, 3))
+        del out
+        target = path
+    else:
+        shm = shared_memory.SharedMemory(create=True, size=max(n_points * 3 * 4, 1))
+        target = (shm.name,)
+
+    try:
+        tasks = [(target, n_points, int(bounds[i]), int(bounds[i + 1]), transforms, probabilities,
+                  seed_sequences[i], walkers, warmup) for i in range(chains)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(_sample_chain, tasks))
+
+        if shm is None:
+            return np.load(path, mmap_mode='r+')
+        shared = np.ndarray((n_points, 3), dtype=np.float32, buffer=shm.buf)
+        result = shared.copy()
+        del shared
+        return result
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+def export_points(transforms, probabilities, n_points, path, chunk_size=1000000, seed=None):
+    """Write chaos game points to a binary PLY or a .npy file without holding them all in memory"""
+    if path.endswith(".npy"):
+        # The chaos game writes straight into the memory-mapped file
+        out = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=(n_points, 3))
+        game = ChaosGame(transforms, probabilities, seed=seed)
+        for start in range(0, n_points, chunk_size):
+            game.run(min(chunk_size, n_points - start), out=out[start:start + chunk_size])
+        out.flush()
+        del out
+    elif path.endswith(".ply"):
+        header = ("ply\n"
+                  "format binary_little_endian 1.0\n"
+                  f"element vertex {n_points}\n"
+                  "property float x\n"
+                  "property float y\n"
+                  "property float z\n"
+                  "end_header\n")
+        with open(path, "wb") as f:
+            f.write(header.encode("ascii"))
+            for chunk in iter_fractal_points(transforms, probabilities, n_points, chunk_size, seed=seed):
+                f.write(chunk.astype('<f4', copy=False).tobytes())
+    else:
+        raise ValueError(f"Unsupported point cloud format: {path}")
+
+class VoxelDecimator:
+    """Keeps the first point that falls into each voxel of a regular grid.
+
+    Points can be added chunk by chunk, the result has at most one point per
+    occupied voxel no matter how many points were streamed through.
+    """
+    def __init__(self, bounds, resolution=256):
+        self.lower = np.asarray(bounds[0], dtype=np.float64)
+        self.upper = np.asarray(bounds[1], dtype=np.float64)
+        self.resolution = resolution
+        self.keys = np.empty(0, dtype=np.int64)
+        self.points = np.empty((0, 3), dtype=np.float32)
+
+    def add(self, points):
+        cells = np.floor((points - self.lower) / (self.upper - self.lower) * self.resolution).astype(np.int64)
+        inside = np.all((cells >= 0) & (cells < self.resolution), axis=1)
+        points, cells = points[inside], cells[inside]
+
+        keys = np.ravel_multi_index(cells.T, (self.resolution,) * 3)
+        keys, first = np.unique(keys, return_index=True)
+        new = ~np.isin(keys, self.keys, assume_unique=True)
+        self.keys = np.concatenate([self.keys, keys[new]])
+        self.points = np.concatenate([self.points, points[first[new]].astype(np.float32)])
+
+def density_sample(chunks, max_points, seed=None):
+    """Uniform random subset of streamed points, dense regions keep proportionally more points"""
+    rng = np.random.default_rng(seed)
+    sample = np.empty((0, 3), dtype=np.float32)
+    sample_keys = np.empty(0)
+    for chunk in chunks:
+        # Keep the points with the smallest random keys seen so far (reservoir sampling)
+        keys = np.concatenate([sample_keys, rng.random(len(chunk))])
+        points = np.concatenate([sample, chunk.astype(np.float32, copy=False)])
+        if len(keys) > max_points:
+            keep = np.argpartition(keys, max_points)[:max_points]
+            keys, points = keys[keep], points[keep]
+        sample_keys, sample = keys, points
+    return sample
+
+def estimate_bounds(transforms, probabilities=None, samples=200000, padding=0.05, seed=None):
+    """Bounding box of the attractor from a short chaos game run, padded on every side"""
+    points = ChaosGame(transforms, probabilities, seed=seed).run(samples)
+    lower = points.min(axis=0).astype(np.float64)
+    upper = points.max(axis=0).astype(np.float64)
+    # Flat attractors (e.g. a stem with zero thickness) still need a non-empty box
+    pad = np.maximum((upper - lower) * padding, 1e-6)
+    return lower - pad, upper + pad
+
+def attractor_bounds(transforms, iterations=200):
+    """Box that every transform maps into itself, so it contains the whole attractor.
+
+    Starts at the fixed points of the transforms and grows the box to the hull of
+    its images (transformed corners) until it stops changing.
+    """
+    affine = transforms_to_affine(transforms)
+    linear, shift = affine[:, :, :3], affine[:, :, 3]
+    fixed_points = np.array([np.linalg.lstsq(np.eye(3) - a, t, rcond=None)[0] for a, t in zip(linear, shift)])
+    lower, upper = fixed_points.min(axis=0), fixed_points.max(axis=0)
+
     for _ in range(iterations):
-        transform_idx = random.choices(range(len(transforms)), weights=probabilities, k=1)[0]
-        transform = transforms[transform_idx]
-        
-        current_point = apply_transform(current_point, transform)
-        points.append(current_point)
-    
-    x_coords = [p[0] for p in points]
-    y_coords = [p[1] for p in points]
-    z_coords = [p[2] for p in points]
-    
-    return x_coords, y_coords, z_coords
+        corners = np.array(np.meshgrid(*zip(lower, upper), indexing='ij')).reshape(3, -1).T
+        images = np.einsum('kij,cj->kci', linear, corners) + shift[:, np.newaxis, :]
+        new_lower = np.minimum(lower, images.min(axis=(0, 1)))
+        new_upper = np.maximum(upper, images.max(axis=(0, 1)))
+        if np.allclose(new_lower, lower) and np.allclose(new_upper, upper):
+            break
+        lower, upper = new_lower, new_upper
+
+    pad = np.maximum((upper - lower) * 1e-3, 1e-6)
+    return lower - pad, upper + pad
+
+def render_attractor(transforms, resolution=256, bounds=None):
+    """Voxel cover of the attractor: (occupancy grid, centers of occupied voxels, (lower, upper) bounds)"""
+    box = attractor_bounds(transforms)
+    if bounds is None:
+        # Coarse passes shrink the box to the occupied cells, each still contains the attractor
+        for _ in range(3):
+            occupied = np.argwhere(_attractor_cover(transforms, 32, box, box))
+            lower, upper = box
+            cell = (upper - lower) / 32
+            box = (lower + occupied.min(axis=0) * cell, lower + (occupied.max(axis=0) + 1) * cell)
+        bounds = box
+    occupancy = _attractor_cover(transforms, resolution, bounds, box)
+    lower = np.asarray(bounds[0], dtype=np.float64)
+    cell = (np.asarray(bounds[1], dtype=np.float64) - lower) / resolution
+    points = (lower + (np.argwhere(occupancy) + 0.5) * cell).astype(np.float32)
+    return occupancy, points, bounds
+
+def _attractor_cover(transforms, resolution, bounds, box, batch_size=1 << 18):
+    """Voxels of bounds overlapped by the voxel-sized images f_w(box) of a box containing the attractor"""
+    lower = np.asarray(bounds[0], dtype=np.float64)
+    upper = np.asarray(bounds[1], dtype=np.float64)
+    cell = (upper - lower) / resolution
+    shape = (resolution,) * 3
+    occupancy = np.zeros(shape, dtype=bool)
+
+    affine = transforms_to_affine(transforms)
+    linear, shift = affine[:, :, :3], affine[:, :, 3]
+    box_center = (np.asarray(box[0]) + np.asarray(box[1])) / 2
+    box_half = (np.asarray(box[1]) - np.asarray(box[0])) / 2
+
+    # A = f_1(A) u ... u f_k(A), so A lies in the union of f_w(box) over all compositions w.
+    # Compositions are extended until f_w(box) is at most one voxel wide, so every voxel
+    # the attractor touches gets occupied and the hulls only add a thin rim.
+    # Depth-first over compositions, kept as stacked affine maps in batches
+    stack = [(np.eye(3)[np.newaxis], np.zeros((1, 3)))]
+    while stack:
+        maps, shifts = stack.pop()
+        centers = np.einsum('nij,j->ni', maps, box_center) + shifts
+        halves = np.abs(maps) @ box_half
+        small = np.all(2 * halves <= cell, axis=1)
+
+        # A hull at most one voxel wide overlaps at most 2 voxels along each axis
+        first = np.floor((centers[small] - halves[small] - lower) / cell).astype(np.int64)
+        last = np.floor((centers[small] + halves[small] - lower) / cell).astype(np.int64)
+        inside = np.all((last >= 0) & (first < resolution), axis=1)
+        first = np.clip(first[inside], 0, resolution - 1)
+        last = np.clip(last[inside], 0, resolution - 1)
+        for offset in np.ndindex(2, 2, 2):
+            valid = np.all(first + offset <= np.maximum(last, first), axis=1)
+            occupancy[tuple((first[valid] + offset).T)] = True
+
+        # f_w o f_k for every transform k of the pieces that are still too big
+        maps, shifts = maps[~small], shifts[~small]
+        if len(maps):
+            shifts = (np.einsum('nij,kj->nki', maps, shift) + shifts[:, np.newaxis, :]).reshape(-1, 3)
+            maps = np.einsum('nij,kjl->nkil', maps, linear).reshape(-1, 3, 3)
+            for start in range(0, len(maps), batch_size):
+                stack.append((maps[start:start + batch_size], shifts[start:start + batch_size]))
+    return occupancy
+
+class DensityAccumulator:
+    """Bins points into a 3D voxel histogram and XY/XZ/YZ projection histograms.
+
+    Memory is fixed by the resolutions, so any number of points can be added
+    chunk by chunk. Points outside the bounds are only counted.
+    """
+    PLANES = {"xy": (0, 1), "xz": (0, 2), "yz": (1, 2)}
+
+    def __init__(self, bounds, resolution=128, projection_resolution=512):
+        self.lower = np.asarray(bounds[0], dtype=np.float64)
+        self.upper = np.asarray(bounds[1], dtype=np.float64)
+        self.resolution = resolution
+        self.projection_resolution = projection_resolution
+        self.volume = np.zeros((resolution,) * 3, dtype=np.uint32)
+        self.projections = {plane: np.zeros((projection_resolution,) * 2, dtype=np.uint64)
+                            for plane in self.PLANES}
+        self.count = 0
+        self.outside = 0
+
+    def _cells(self, points, resolution):
+        scaled = (points - self.lower) / (self.upper - self.lower) * resolution
+        cells = np.floor(scaled).astype(np.int64)
+        inside = np.all((cells >= 0) & (cells < resolution), axis=1)
+        return cells[inside]
+
+    def add(self, points):
+        self.count += len(points)
+
+        cells = self._cells(points, self.resolution)
+        self.outside += len(points) - len(cells)
+        flat = np.ravel_multi_index(cells.T, self.volume.shape)
+        self.volume += np.bincount(flat, minlength=self.volume.size).reshape(self.volume.shape).astype(np.uint32)
+
+        cells = self._cells(points, self.projection_resolution)
+        for plane, (a, b) in self.PLANES.items():
+            flat = cells[:, a] * self.projection_resolution + cells[:, b]
+            counts = np.bincount(flat, minlength=self.projection_resolution ** 2)
+            self.projections[plane] += counts.reshape(self.projection_resolution, -1).astype(np.uint64)
+
+    def coverage_per_sample(self):
+        """Occupied voxels per added point, higher means fewer points are wasted on filled voxels"""
+        return np.count_nonzero(self.volume) / max(self.count, 1)
+
+    def log_density(self, plane=None):
+        """log(1 + count) of the volume, or of a projection when plane is given"""
+        counts = self.volume if plane is None else self.projections[plane]
+        return np.log1p(counts, dtype=np.float32)
+
+    def volume_figure(self, colorscale='Viridis', title=None, max_resolution=64):
+        # Sum blocks of voxels so the browser gets at most max_resolution^3 values
+        factor = max(1, -(-self.resolution // max_resolution))
+        size = self.resolution // factor
+        counts = self.volume[:size * factor, :size * factor, :size * factor]
+        counts = counts.reshape(size, factor, size, factor, size, factor).sum(axis=(1, 3, 5))
+        density = np.log1p(counts, dtype=np.float32)
+
+        axes = [np.linspace(lo, hi, size, dtype=np.float32) for lo, hi in zip(self.lower, self.upper)]
+        x, y, z = np.meshgrid(*axes, indexing='ij')
+        fig = go.Figure(data=go.Volume(
+            x=x.ravel(), y=y.ravel(), z=z.ravel(),
+            value=density.ravel(),
+            isomin=float(density.max()) * 0.1,
+            isomax=float(density.max()),
+            opacity=0.1,
+            surface_count=20,
+            colorscale=colorscale
+        ))
+        fig.update_layout(title_text=title, scene=dict(aspectmode='data'))
+        return fig
+
+    def image_figure(self, plane="xy", colorscale='Viridis', title=None):
+        a, b = self.PLANES[plane]
+        fig = go.Figure(data=go.Heatmap(
+            z=self.log_density(plane).T,
+            x=np.linspace(self.lower[a], self.upper[a], self.projection_resolution, dtype=np.float32),
+            y=np.linspace(self.lower[b], self.upper[b], self.projection_resolution, dtype=np.float32),
+            colorscale=colorscale
+        ))
+        fig.update_layout(title_text=title, xaxis_title=plane[0].upper(), yaxis_title=plane[1].upper(),
+                          yaxis_scaleanchor='x')
+        return fig
+
+def accumulate_density(transforms, probabilities, n_points, resolution=128, projection_resolution=512,
+                       chunk_size=1000000, bounds=None, seed=None):
+    """Run the chaos game chunk by chunk straight into a DensityAccumulator"""
+    if bounds is None:
+        bounds = estimate_bounds(transforms, probabilities, seed=seed)
+    accumulator = DensityAccumulator(bounds, resolution, projection_resolution)
+    for chunk in iter_fractal_points(transforms, probabilities, n_points, chunk_size, seed=seed):
+        accumulator.add(chunk)
+    return accumulator
 
 first_model_transforms = [
     [0.00, 0.00, 0.01, 0.00, 0.26, 0.00, 0.00, 0.00, 0.05, 0.00, 0.00, 0.00],
@@ -45,62 +423,116 @@ second_model_transforms = [
 
 probabilities = [0.25, 0.25, 0.25, 0.25]
 
+models = (
+    (first_model_transforms, 'Viridis', "First Model"),
+    (second_model_transforms, 'Plasma', "Second Model"),
+)
 
+def points_figure(points, colorscale, title, name=None):
+    # float32 columns are sent to the browser as typed arrays instead of JSON number lists
+    points = np.asarray(points, dtype=np.float32)
+    fig = go.Figure(data=[
+        go.Scatter3d(
+            x=points[:, 0], y=points[:, 1], z=points[:, 2],
+            mode='markers',
+            marker=dict(
+                size=1,
+                color=points[:, 2],
+                colorscale=colorscale,
+                opacity=0.8
+            ),
+            name=name
+        )
+    ])
 
-x1, y1, z1 = generate_fractal(first_model_transforms, probabilities)
-x2, y2, z2 = generate_fractal(second_model_transforms, probabilities)
-
-fig1 = go.Figure(data=[
-    go.Scatter3d(
-        x=x1, y=y1, z=z1,
-        mode='markers',
-        marker=dict(
-            size=1,
-            color=z1,
-            colorscale='Viridis',
-            opacity=0.8
-        ),
-        name="Model 1"
-    )
-])
-
-fig1.update_layout(
-    title_text="3D Fern-like Fractal - First Model",
-    width=1920,
-    height=1080,
-    scene=dict(
-        aspectmode='data',
-        xaxis_title='X',
-        yaxis_title='Y',
-        zaxis_title='Z'
+    fig.update_layout(
+        title_text=title,
+        width=1920,
+        height=1080,
+        scene=dict(
+            aspectmode='data',
+            xaxis_title='X',
+            yaxis_title='Y',
+            zaxis_title='Z'
+        )
     )
-)
+    return fig
 
-fig2 = go.Figure(data=[
-    go.Scatter3d(
-        x=x2, y=y2, z=z2,
-        mode='markers',
-        marker=dict(
-            size=1,
-            color=z2,
-            colorscale='Plasma',
-            opacity=0.8
-        ),
-        name="Model 2"
-    )
-])
-
-fig2.update_layout(
-    title_text="3D Fern-like Fractal - Second Model",
-    width=1920,
-    height=1080,
-    scene=dict(
-        aspectmode='data',
-        xaxis_title='X',
-        yaxis_title='Y',
-        zaxis_title='Z'
-    )
-)
+def show_density(n_points, weights):
+    for transforms, colorscale, title in models:
+        accumulator = accumulate_density(transforms, weights, n_points)
+        print(f"{title}: {np.count_nonzero(accumulator.volume)} occupied voxels, "
+              f"coverage per sample {accumulator.coverage_per_sample():.6f}")
+        accumulator.volume_figure(colorscale, f"3D Fern-like Fractal - {title} (log density)").show()
+        accumulator.image_figure("xy", colorscale, f"3D Fern-like Fractal - {title} (XY log density)").show()
+
+def show_decimated(n_points, method, max_points, weights):
+    for transforms, colorscale, title in models:
+        chunks = iter_fractal_points(transforms, weights, n_points)
+        if method == "voxel":
+            decimator = VoxelDecimator(estimate_bounds(transforms, weights))
+            for chunk in chunks:
+                decimator.add(chunk)
+            points = decimator.points
+        else:
+            points = density_sample(chunks, max_points)
+        title = f"3D Fern-like Fractal - {title} ({len(points)} of {n_points} points)"
+        points_figure(points, colorscale, title).show()
+
+def show_exact(resolution):
+    for transforms, colorscale, title in models:
+        _, points, _ = render_attractor(transforms, resolution)
+        title = f"3D Fern-like Fractal - {title} (exact, {resolution}^3 voxels)"
+        points_figure(points, colorscale, title).show()
+
+def export_models(path, n_points, weights, workers=1):
+    stem, ext = os.path.splitext(path)
+    for number, (transforms, _, _) in enumerate(models, start=1):
+        model_path = f"{stem}_{number}{ext}"
+        if workers > 1 and ext == ".npy":
+            sample_parallel(transforms, weights, n_points, workers=workers, path=model_path)
+        else:
+            export_points(transforms, weights, n_points, model_path)
+        print(f"Saved {n_points} points to {model_path}")
+
+def main():
+    parser = argparse.ArgumentParser(description="3D IFS fractal generator")
+    parser.add_argument("--mode", choices=["points", "density", "view", "exact"], default="points",
+                        help="show raw points, a log-density volume/projection, a decimated view of many points "
+                             "or the deterministic voxel attractor")
+    parser.add_argument("--points", type=int, default=None,
+                        help="number of generated points (default 50000 for points, 10000000 otherwise)")
+    parser.add_argument("--decimate", choices=["voxel", "sample"], default="voxel",
+                        help="decimation of the view mode: one point per voxel or a uniform density sample")
+    parser.add_argument("--max-points", type=int, default=200000,
+                        help="number of points kept by the density sample")
+    parser.add_argument("--export", metavar="PATH",
+                        help="write both models to PATH (.ply or .npy, suffixed _1/_2) instead of showing them")
+    parser.add_argument("--resolution", type=int, default=256,
+                        help="voxel resolution of the exact mode")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="sample with this many processes (points mode and .npy export)")
+    parser.add_argument("--weights", choices=["uniform", "determinant"], default="uniform",
+                        help="transform probabilities: uniform or proportional to |det| of each transform")
+    args = parser.parse_args()
+    weights = probabilities if args.weights == "uniform" else "determinant"
+
+    if args.export:
+        export_models(args.export, args.points or 10000000, weights, args.workers)
+    elif args.mode == "density":
+        show_density(args.points or 10000000, weights)
+    elif args.mode == "exact":
+        show_exact(args.resolution)
+    elif args.mode == "view":
+        show_decimated(args.points or 10000000, args.decimate, args.max_points, weights)
+    else:
+        n_points = args.points or 50000
+        for number, (transforms, colorscale, title) in enumerate(models, start=1):
+            if args.workers > 1:
+                points = sample_parallel(transforms, weights, n_points, workers=args.workers)
+            else:
+                points = ChaosGame(transforms, weights).run(n_points)
+            points_figure(points, colorscale, f"3D Fern-like Fractal - {title}", f"Model {number}").show()
 
-fig1.show()
-fig2.show()
+if __name__ == "__main__":
+    main()
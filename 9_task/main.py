@@ -1,3 +1,5 @@
+import os
+from collections import OrderedDict
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
@@ -6,19 +8,21 @@ import tkinter as tk
 from tkinter import ttk
 
 class FractalLandscape:
-    def __init__(self, iterations, roughness):
+    def __init__(self, iterations, roughness, seed=None):
         self.iterations = iterations
         self.roughness = roughness
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
         self.size = 2**iterations + 1
         self.height_map = np.zeros((self.size, self.size))
     
     def generate(self):
         # Initialize corners
         size = self.size - 1
-        self.height_map[0, 0] = np.random.normal(0, 1)
-        self.height_map[0, size] = np.random.normal(0, 1)
-        self.height_map[size, 0] = np.random.normal(0, 1)
-        self.height_map[size, size] = np.random.normal(0, 1)
+        self.height_map[0, 0] = self.rng.normal(0, 1)
+        self.height_map[0, size] = self.rng.normal(0, 1)
+        self.height_map[size, 0] = self.rng.normal(0, 1)
+        self.height_map[size, size] = self.rng.normal(0, 1)
         
         # Iteratively subdivide
         step = size
@@ -34,7 +38,7 @@ class FractalLandscape:
                            self.height_map[x, y + step] + 
                            self.height_map[x + step, y + step]) / 4.0
                     
-                    self.height_map[x + half, y + half] = avg + np.random.normal(0, roughness)
+                    self.height_map[x + half, y + half] = avg + self.rng.normal(0, roughness)
             
             # Square step
             for x in range(0, self.size - 1, half):
@@ -56,13 +60,270 @@ class FractalLandscape:
                         count += 1
                         
                     avg /= count
-                    self.height_map[x, y] = avg + np.random.normal(0, roughness)
+                    self.height_map[x, y] = avg + self.rng.normal(0, roughness)
             
             step = half
             roughness *= 0.5
             
         return self.height_map
 
+class HeightMapCache:
+    """LRU cache of generated height maps keyed by (seed, iterations, roughness).
+
+    Maps are stored as float32, in memory up to max_memory_bytes and optionally
+    on disk as compressed .npz files in cache_dir up to max_disk_bytes.
+    """
+    def __init__(self, cache_dir=None, max_memory_bytes=256 * 2**20, max_disk_bytes=1024 * 2**20):
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.entries = OrderedDict()
+        self.memory_bytes = 0
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(seed, iterations, roughness):
+        return (int(seed), int(iterations), float(roughness))
+
+    def _path(self, key):
+        seed, iterations, roughness = key
+        return os.path.join(self.cache_dir, f"heightmap_{seed}_{iterations}_{roughness.hex()}.npz")
+
+    def get(self, key):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+        if self.cache_dir is not None:
+            path = self._path(key)
+            if os.path.exists(path):
+                with np.load(path) as data:
+                    height_map = data["height_map"]
+                os.utime(path)  # mark as recently used for disk eviction
+                return self._remember(key, height_map)
+        return None
+
+    def put(self, key, height_map):
+        height_map = self._remember(key, height_map)
+        if self.cache_dir is not None:
+            np.savez_compressed(self._path(key), height_map=height_map)
+            self._evict_disk()
+        return height_map
+
+    def get_or_generate(self, seed, iterations, roughness):
+        key = self.make_key(seed, iterations, roughness)
+        height_map = self.get(key)
+        if height_map is None:
+            height_map = FractalLandscape(iterations, roughness, seed).generate()
+            height_map = self.put(key, height_map)
+        return height_map
+
+    def clear(self):
+        self.entries.clear()
+        self.memory_bytes = 0
+
+    def _remember(self, key, height_map):
+        height_map = np.asarray(height_map, dtype=np.float32)
+        # Cached maps are shared between callers, so keep them immutable
+        height_map.flags.writeable = False
+
+        if key in self.entries:
+            self.memory_bytes -= self.entries.pop(key).nbytes
+        self.entries[key] = height_map
+        self.memory_bytes += height_map.nbytes
+
+        # Evict least recently used maps, but always keep the newest one
+        while self.memory_bytes > self.max_memory_bytes and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.memory_bytes -= evicted.nbytes
+        return height_map
+
+    def _evict_disk(self):
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if name.startswith("heightmap_") and name.endswith(".npz"):
+                path = os.path.join(self.cache_dir, name)
+                stat = os.stat(path)
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files)[:-1]:
+            if total <= self.max_disk_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+class TerrainPostProcessor:
+    """Vectorized derivative and erosion passes over float32 height maps.
+
+    All passes write into preallocated float32 arrays (or modify the height map
+    in place for erosion). With chunk_rows set, slope, normals, hillshade and
+    erosion are computed in bands of rows with a one row halo, so temporaries stay
+    proportional to the band size. cell_size is the grid spacing in height units,
+    by default 1 / (rows - 1) like the GUI's unit square extent.
+    """
+    def __init__(self, cell_size=None, chunk_rows=None):
+        self.cell_size = cell_size
+        self.chunk_rows = chunk_rows
+
+    def _cell(self, height_map):
+        if self.cell_size is not None:
+            return self.cell_size
+        return 1.0 / max(height_map.shape[0] - 1, 1)
+
+    def _bands(self, rows):
+        chunk = self.chunk_rows or rows
+        for start in range(0, rows, chunk):
+            stop = min(start + chunk, rows)
+            yield start, stop, max(start - 1, 0), min(stop + 1, rows)
+
+    def _band_gradients(self, height_map):
+        """Yield (start, stop, dx, dy) per band, the gradients only cover the band's own rows"""
+        cell = self._cell(height_map)
+        for start, stop, halo_start, halo_stop in self._bands(height_map.shape[0]):
+            # Halo rows make the band edges use central differences like the full map would
+            d_rows, d_cols = np.gradient(height_map[halo_start:halo_stop], cell)
+            inner = slice(start - halo_start, stop - halo_start)
+            yield start, stop, d_cols[inner], d_rows[inner]
+
+    def gradients(self, height_map, out_dx=None, out_dy=None):
+        rows, cols = height_map.shape
+        if out_dx is None:
+            out_dx = np.empty((rows, cols), dtype=np.float32)
+        if out_dy is None:
+            out_dy = np.empty((rows, cols), dtype=np.float32)
+        for start, stop, dx, dy in self._band_gradients(height_map):
+            out_dx[start:stop] = dx
+            out_dy[start:stop] = dy
+        return out_dx, out_dy
+
+    def slope(self, height_map, out=None):
+        """Slope in degrees"""
+        if out is None:
+            out = np.empty(height_map.shape, dtype=np.float32)
+        for start, stop, dx, dy in self._band_gradients(height_map):
+            band = out[start:stop]
+            np.hypot(dx, dy, out=band, casting="unsafe")
+            np.arctan(band, out=band)
+            np.degrees(band, out=band)
+        return out
+
+    def _band_normals(self, dx, dy, out):
+        out[..., 0] = -dx
+        out[..., 1] = -dy
+        out[..., 2] = 1.0
+        # Reuse dx as the norm buffer
+        np.sqrt(dx * dx + dy * dy + 1.0, out=dx)
+        out /= dx[..., np.newaxis]
+        return out
+
+    def normals(self, height_map, out=None):
+        """Unit surface normals as a (rows, cols, 3) array"""
+        if out is None:
+            out = np.empty(height_map.shape + (3,), dtype=np.float32)
+        for start, stop, dx, dy in self._band_gradients(height_map):
+            self._band_normals(dx, dy, out[start:stop])
+        return out
+
+    def hillshade(self, height_map, azimuth=315.0, altitude=45.0, out=None):
+        """Lambertian shading in <0, 1> for a light at the given azimuth/altitude (degrees)"""
+        azimuth = np.radians(azimuth)
+        altitude = np.radians(altitude)
+        light = np.array([np.cos(altitude) * np.cos(azimuth),
+                          np.cos(altitude) * np.sin(azimuth),
+                          np.sin(altitude)], dtype=np.float32)
+        if out is None:
+            out = np.empty(height_map.shape, dtype=np.float32)
+        for start, stop, dx, dy in self._band_gradients(height_map):
+            normals = self._band_normals(dx, dy, np.empty(dx.shape + (3,), dtype=np.float32))
+            np.matmul(normals, light, out=out[start:stop])
+            np.clip(out[start:stop], 0.0, 1.0, out=out[start:stop])
+        return out
+
+    def _exchange(self, layers, talus, rate, limited=False):
+        """Yield (start, stop, delta) per band, the caller adds delta before the next band"""
+        saved = None
+        for start, stop, halo_start, halo_stop in self._bands(layers[0].shape[0]):
+            bands = [layer[halo_start:halo_stop].copy() for layer in layers]
+            # The halo row shared with the previous band is restored from its copy taken before
+            # that band changed, so every band sees the layers as they were at the start
+            if saved is not None:
+                for band, row in zip(bands, saved):
+                    band[0] = row
+            saved = [layer[stop - 1].copy() for layer in layers]
+
+            surface = bands[0] if len(bands) == 1 else sum(bands)
+            band_limit = bands[-1] if limited else None
+            band_delta = np.zeros(surface.shape, dtype=np.float32)
+
+            for axis in (0, 1):
+                first = [slice(None), slice(None)]
+                second = [slice(None), slice(None)]
+                first[axis] = slice(None, -1)
+                second[axis] = slice(1, None)
+                first, second = tuple(first), tuple(second)
+
+                # Each pair moves rate/4 of its difference above talus downhill (limited: at most 1/4 of the last layer)
+                diff = surface[first] - surface[second]
+                amount = np.maximum(np.abs(diff) - talus, 0.0) * (0.25 * rate)
+                if band_limit is not None:
+                    source_limit = np.where(diff > 0, band_limit[first], band_limit[second])
+                    np.minimum(amount, 0.25 * source_limit, out=amount)
+                amount *= np.sign(diff)
+
+                band_delta[first] -= amount
+                band_delta[second] += amount
+
+            yield start, stop, band_delta[start - halo_start:stop - halo_start]
+
+    def thermal_erosion(self, height_map, iterations=50, talus=None, rate=0.5):
+        """Collapse slopes steeper than talus, modifies height_map in place.
+
+        talus is a height difference per cell, by default 4 * cell_size (slopes steeper than arctan(4))
+        """
+        if talus is None:
+            talus = 4.0 * self._cell(height_map)
+        for _ in range(iterations):
+            for start, stop, delta in self._exchange((height_map,), talus, rate):
+                height_map[start:stop] += delta
+        return height_map
+
+    def hydraulic_erosion(self, height_map, iterations=50, rain=0.01, solubility=0.1, evaporation=0.5):
+        """Cheap rainfall erosion, modifies height_map in place.
+
+        Water flows downhill over the terrain surface and carries solubility times
+        the moved water of soil along with it, so steep runoff carves valleys and
+        deposits material further down.
+        """
+        water = np.zeros(height_map.shape, dtype=np.float32)
+        for _ in range(iterations):
+            water += rain
+            for start, stop, flow in self._exchange((height_map, water), 0.0, 1.0, limited=True):
+                water[start:stop] += flow
+                height_map[start:stop] += solubility * flow
+            water *= 1.0 - evaporation
+        return height_map
+
+    def process(self, height_map, thermal_iterations=0, hydraulic_iterations=0,
+                azimuth=315.0, altitude=45.0):
+        """Run the erosion passes and derive slope, normals and hillshade.
+
+        Returns a dict of float32 layers, the input map itself is never modified.
+        """
+        height = np.array(height_map, dtype=np.float32)
+        if hydraulic_iterations:
+            self.hydraulic_erosion(height, hydraulic_iterations)
+        if thermal_iterations:
+            self.thermal_erosion(height, thermal_iterations)
+
+        return {
+            "height": height,
+            "slope": self.slope(height),
+            "normals": self.normals(height),
+            "hillshade": self.hillshade(height, azimuth, altitude),
+        }
+
 class FractalLandscapeApp:
     def __init__(self, root):
         self.root = root
@@ -80,9 +341,16 @@ class FractalLandscapeApp:
         ttk.Label(input_frame, text="Roughness:").grid(column=0, row=1, padx=5, pady=5, sticky="w")
         self.roughness_var = tk.StringVar(value="1.0")
         ttk.Entry(input_frame, textvariable=self.roughness_var, width=10).grid(column=1, row=1, padx=5, pady=5, sticky="w")
+
+        ttk.Label(input_frame, text="Seed:").grid(column=0, row=2, padx=5, pady=5, sticky="w")
+        self.seed_var = tk.StringVar(value="0")
+        ttk.Entry(input_frame, textvariable=self.seed_var, width=10).grid(column=1, row=2, padx=5, pady=5, sticky="w")
         
 
-        ttk.Button(input_frame, text="Generate", command=self.generate_landscape).grid(column=2, row=0, rowspan=2, padx=10, pady=5)
+        ttk.Button(input_frame, text="Generate", command=self.generate_landscape).grid(column=2, row=0, rowspan=3, padx=10, pady=5)
+
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "terrain_cache")
+        self.cache = HeightMapCache(cache_dir)
         
 
         self.fig = plt.figure(figsize=(8, 6))
@@ -100,6 +368,14 @@ class FractalLandscapeApp:
             iterations = int(self.iterations_var.get())
             print(f"ITERATIONS: {iterations}")
             roughness = float(self.roughness_var.get())
+
+            # Empty seed means a new random terrain, the chosen seed is shown so it can be reproduced
+            seed_text = self.seed_var.get().strip()
+            if seed_text:
+                seed = int(seed_text)
+            else:
+                seed = int(np.random.default_rng().integers(2**31))
+                self.seed_var.set(str(seed))
             
             if iterations < 1:
                 iterations = 1
@@ -107,8 +383,7 @@ class FractalLandscapeApp:
             self.ax.clear()
             
 
-            fractal = FractalLandscape(iterations, roughness)
-            height_map = fractal.generate()
+            height_map = self.cache.get_or_generate(seed, iterations, roughness)
             
             x = np.linspace(0, 1, height_map.shape[0])
             y = np.linspace(0, 1, height_map.shape[1])
@@ -125,7 +400,7 @@ class FractalLandscapeApp:
             self.canvas.draw()
             
         except ValueError:
-            print("Please enter valid numbers for iterations and roughness")
+            print("Please enter valid numbers for iterations, roughness and seed")
 
 if __name__ == "__main__":
     root = tk.Tk()